@@ -0,0 +1,19 @@
+# Generated by Django 5.1.5 on 2026-10-16 12:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("bots", "0006_remove_bot_background_image_remove_bot_theme_color_and_more"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="bot",
+            index=models.Index(
+                fields=["publicity", "name"], name="bot_publicity_name_idx"
+            ),
+        ),
+    ]
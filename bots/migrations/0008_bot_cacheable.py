@@ -0,0 +1,18 @@
+# Generated by Django 5.1.5 on 2026-10-16 12:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("bots", "0007_bot_publicity_name_idx"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="bot",
+            name="cacheable",
+            field=models.BooleanField(default=False),
+        ),
+    ]
@@ -35,6 +35,9 @@ class Bot(models.Model):
     # --- NEW: Flag to enable web search capability ---
     allow_web_search = models.BooleanField(default=False)
     strict_context = models.BooleanField(default=False)
+    # Respostas podem ser reaproveitadas do cache para perguntas repetidas.
+    # Desligado por padrão: bots com respostas criativas ou que mudam com o tempo não devem usar
+    cacheable = models.BooleanField(default=False)
 
     publicity = models.CharField(max_length=10, choices=Publicity.choices, default=Publicity.PUBLIC)
     is_official = models.BooleanField(default=False)
@@ -53,5 +56,11 @@ class Bot(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            # Explore: filtro por publicidade ordenado por nome
+            models.Index(fields=['publicity', 'name'], name='bot_publicity_name_idx'),
+        ]
+
     def __str__(self):
         return self.name
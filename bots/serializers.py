@@ -50,7 +50,7 @@ class BotSerializer(serializers.ModelSerializer):
         model = Bot
         fields = (
             'id', 'name', 'description','prompt', 'avatar_url', 'voice',
-            'allow_web_search', 'strict_context',
+            'allow_web_search', 'strict_context', 'cacheable',
             'publicity', 'is_official', 'owner', 'owner_username',
             'categories', 'category_ids', 'study_space_ids'
         )
@@ -106,7 +106,7 @@ class BotDetailSerializer(serializers.ModelSerializer):
             'id', 'name', 'handle', 'description', 'prompt',
             'avatarUrl',
             'stats', 'tags', 'createdByMe', 'settings', 'categories',
-            'allow_web_search', 'strict_context', 'study_spaces'
+            'allow_web_search', 'strict_context', 'cacheable', 'study_spaces'
         )
 
 
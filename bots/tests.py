@@ -1,3 +1,23 @@
-from django.test import TestCase
+from django.contrib.auth import get_user_model
+from rest_framework import status
+from rest_framework.test import APITestCase
 
-# Create your tests here.
+User = get_user_model()
+
+
+class BotCreateValidationTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='owner', password='password')
+        self.client.force_authenticate(user=self.user)
+
+    def test_list_field_errors_render_as_400(self):
+        """
+        Erros de ListField vêm indexados por posição ({0: [...]}) e precisam
+        ser renderizados, não virar um 500
+        """
+        response = self.client.post(
+            '/api/v1/bots/', {'name': 'Bot', 'category_ids': ['abc']}, format='json'
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('0', response.json()['category_ids'])
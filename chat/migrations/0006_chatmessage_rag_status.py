@@ -0,0 +1,27 @@
+# Generated by Django 5.1.5 on 2026-10-16 12:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("chat", "0005_chat_sources"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="chatmessage",
+            name="rag_status",
+            field=models.CharField(
+                blank=True,
+                choices=[
+                    ("pending", "Pending"),
+                    ("indexed", "Indexed"),
+                    ("failed", "Failed"),
+                ],
+                max_length=10,
+                null=True,
+            ),
+        ),
+    ]
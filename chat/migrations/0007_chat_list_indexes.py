@@ -0,0 +1,26 @@
+# Generated by Django 5.1.5 on 2026-10-16 12:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("chat", "0006_chatmessage_rag_status"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="chat",
+            index=models.Index(
+                fields=["user", "status", "-last_message_at"],
+                name="chat_user_status_last_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="chat",
+            index=models.Index(
+                fields=["bot", "user", "status"], name="chat_bot_user_status_idx"
+            ),
+        ),
+    ]
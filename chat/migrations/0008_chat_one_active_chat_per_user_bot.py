@@ -0,0 +1,39 @@
+# Generated by Django 5.1.5 on 2026-10-16 12:00
+
+from django.db import migrations, models
+
+
+def archive_duplicate_active_chats(apps, schema_editor):
+    """Mantém só o chat ativo mais recente de cada usuário/bot antes da constraint."""
+    Chat = apps.get_model("chat", "Chat")
+    seen = set()
+    stale_ids = []
+    active = Chat.objects.filter(status="active").order_by(
+        "user_id", "bot_id", "-last_message_at", "-id"
+    ).values_list("id", "user_id", "bot_id")
+    for chat_id, user_id, bot_id in active.iterator():
+        if (user_id, bot_id) in seen:
+            stale_ids.append(chat_id)
+        else:
+            seen.add((user_id, bot_id))
+    if stale_ids:
+        Chat.objects.filter(id__in=stale_ids).update(status="archived")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("chat", "0007_chat_list_indexes"),
+    ]
+
+    operations = [
+        migrations.RunPython(archive_duplicate_active_chats, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name="chat",
+            constraint=models.UniqueConstraint(
+                condition=models.Q(("status", "active")),
+                fields=("user", "bot"),
+                name="one_active_chat_per_user_bot",
+            ),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.1.5 on 2026-10-16 12:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("chat", "0008_chat_one_active_chat_per_user_bot"),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="chat",
+            name="chat_bot_user_status_idx",
+        ),
+        migrations.AddIndex(
+            model_name="chat",
+            index=models.Index(
+                fields=["bot", "user", "status", "-last_message_at"],
+                name="chat_bot_user_status_last_idx",
+            ),
+        ),
+    ]
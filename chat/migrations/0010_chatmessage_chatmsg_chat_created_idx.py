@@ -0,0 +1,19 @@
+# Generated by Django 5.1.5 on 2026-10-16 12:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("chat", "0009_chat_bot_user_status_last_idx"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="chatmessage",
+            index=models.Index(
+                fields=["chat", "-created_at"], name="chatmsg_chat_created_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,39 @@
+# chat/mixins.py
+"""
+Mixins compartilhados pelas views do chat.
+"""
+
+from django.shortcuts import get_object_or_404
+
+from .models import Chat
+
+
+class ChatLookupMixin:
+    """
+    Resolve o chat da URL validando o dono.
+    O resultado fica em cache na instância da view, ou seja, por request.
+    """
+    chat_url_kwargs = ('chat_pk', 'chat_id')
+    # Relações carregadas no mesmo SELECT do chat
+    chat_select_related = ('bot',)
+
+    def get_chat(self, chat_id=None, for_update=False):
+        """
+        for_update=True trava a linha do chat (SELECT ... FOR UPDATE) e
+        ignora o cache; deve ser chamado dentro de transaction.atomic().
+        """
+        if for_update or getattr(self, '_chat', None) is None:
+            if chat_id is None:
+                chat_id = next(self.kwargs[k] for k in self.chat_url_kwargs if k in self.kwargs)
+            queryset = Chat.objects.all()
+            if for_update:
+                queryset = queryset.select_for_update()
+            if self.chat_select_related:
+                # select_related() sem argumentos seguiria todas as FKs
+                queryset = queryset.select_related(*self.chat_select_related)
+            self._chat = get_object_or_404(
+                queryset,
+                id=chat_id,
+                user=self.request.user
+            )
+        return self._chat
@@ -40,6 +40,20 @@ class Chat(models.Model):
 
     class Meta:
         ordering = ['-last_message_at'] # Order chats by the most recent message
+        indexes = [
+            # Listagens de chats ativos/arquivados do usuário, já na ordem do Meta
+            models.Index(fields=['user', 'status', '-last_message_at'], name='chat_user_status_last_idx'),
+            # Chat ativo por bot (bootstrap e SetActive) e arquivados por bot já ordenados
+            models.Index(fields=['bot', 'user', 'status', '-last_message_at'], name='chat_bot_user_status_last_idx'),
+        ]
+        constraints = [
+            # Só um chat ativo por usuário/bot
+            models.UniqueConstraint(
+                fields=['user', 'bot'],
+                condition=models.Q(status='active'),
+                name='one_active_chat_per_user_bot'
+            ),
+        ]
 
     def __str__(self):
         return f"Chat {self.id} between {self.user.username} and {self.bot.name} ({self.status})"
@@ -80,6 +94,19 @@ class ChatMessage(models.Model):
 
     duration = models.IntegerField(default=0, help_text="Audio duration in milliseconds")
 
+    # Estado da indexação RAG do anexo (processada em background)
+    RAG_STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('indexed', 'Indexed'),
+        ('failed', 'Failed'),
+    ]
+    rag_status = models.CharField(
+        max_length=10,
+        choices=RAG_STATUS_CHOICES,
+        null=True,
+        blank=True
+    )
+
     # --------------------
     suggestion1 = models.CharField(max_length=128, null=True, blank=True, help_text="First follow-up suggestion.")
     suggestion2 = models.CharField(max_length=128, null=True, blank=True, help_text="Second follow-up suggestion.")
@@ -95,6 +122,12 @@ class ChatMessage(models.Model):
         blank=True
     )
 
+    class Meta:
+        indexes = [
+            # Paginação por cursor das mensagens do chat (mais recentes primeiro)
+            models.Index(fields=['chat', '-created_at'], name='chatmsg_chat_created_idx'),
+        ]
+
     # -----------------------
     def __str__(self):
         if self.attachment and self.original_filename:
@@ -1,4 +1,5 @@
 # chat/serializers.py
+from django.conf import settings
 from rest_framework import serializers
 from .models import Chat, ChatMessage
 from bots.serializers import BotSerializer
@@ -12,11 +13,12 @@ class ChatMessageSerializer(serializers.ModelSerializer):
         model = ChatMessage
         # Adicionado 'duration' e 'feedback' aos fields para leitura no frontend
         fields = ('id', 'chat', 'role', 'content', 'created_at', 'suggestions',
-                  'attachment_url', 'attachment_type', 'original_filename', 'duration', 'feedback')
+                  'attachment_url', 'attachment_type', 'original_filename', 'duration', 'feedback',
+                  'rag_status')
         
         # Define campos que são apenas leitura na visualização padrão
         read_only_fields = ('id', 'chat','role', 'created_at', 'suggestions',
-                          'attachment_url', 'attachment_type', 'original_filename')
+                          'attachment_url', 'attachment_type', 'original_filename', 'rag_status')
 
     def get_suggestions(self, obj):
         suggestions_list = []
@@ -25,17 +27,18 @@ class ChatMessageSerializer(serializers.ModelSerializer):
         return suggestions_list
 
     def get_attachment_url(self, obj):
-        if obj.attachment and hasattr(obj.attachment, 'url'):
-            request = self.context.get('request', None)
-            if request:
-                try:
-                   # Tenta construir URL absoluta usando o request context
-                   return request.build_absolute_uri(obj.attachment.url)
-                except Exception:
-                    # Fallback para URL relativa
-                    return obj.attachment.url
-            return obj.attachment.url
-        return None
+        if not obj.attachment:
+            return None
+        url = obj.attachment.url
+        request = self.context.get('request', None)
+        if request is None or not url.startswith('/'):
+            return url
+        # Esquema + host calculados uma vez por request: o contexto é
+        # compartilhado por todos os itens de uma listagem (many=True)
+        prefix = self.context.get('_host_prefix')
+        if prefix is None:
+            prefix = self.context['_host_prefix'] = f"{request.scheme}://{request.get_host()}"
+        return prefix + url
 
 class ChatListSerializer(serializers.ModelSerializer):
     bot = BotSerializer(read_only=True)
@@ -46,7 +49,11 @@ class ChatListSerializer(serializers.ModelSerializer):
         fields = ('id', 'bot', 'last_message', 'last_message_at', 'status')
 
     def get_last_message(self, obj):
-        last_msg = obj.messages.order_by('-created_at').first()
+        # Usa a última mensagem pré-carregada pela view quando disponível
+        if hasattr(obj, 'latest_messages'):
+            last_msg = obj.latest_messages[0] if obj.latest_messages else None
+        else:
+            last_msg = obj.messages.order_by('-created_at').first()
         if last_msg:
             return ChatMessageSerializer(last_msg, context=self.context).data
         return None
@@ -66,7 +73,8 @@ class ChatMessageAttachmentSerializer(serializers.ModelSerializer):
         read_only_fields = ('id', 'chat', 'role', 'created_at')
 
     def validate_attachment(self, value):
-        MAX_UPLOAD_SIZE = 50 * 1024 * 1024 # Aumentado para 50MB para consistência com frontend
+        # Mesmo limite do upload handler (50MB por padrão, consistente com o frontend)
+        MAX_UPLOAD_SIZE = settings.FILE_UPLOAD_MAX_SIZE
         if value.size > MAX_UPLOAD_SIZE:
             raise serializers.ValidationError(f"File size cannot exceed {MAX_UPLOAD_SIZE // (1024*1024)}MB.")
         return value
@@ -13,10 +13,12 @@ from .ai_client import get_ai_client
 # Adicione 'process_message_stream' à lista de importações abaixo
 from .chat_service import (
     get_ai_response, 
+    attach_local_file,
     handle_voice_interaction, 
     handle_voice_message, 
     generate_suggestions_for_bot,
-    process_message_stream
+    process_message_stream,
+    process_message_stream_async
 )
 from .memory_service import process_memory_background
 from .tts_service import generate_tts_audio
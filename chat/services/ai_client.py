@@ -7,6 +7,7 @@ Alterne entre os dois mudando USE_VERTEX_AI nas settings.
 from google import genai
 from google.genai import types
 from django.conf import settings
+import functools
 import os
 import logging
 
@@ -20,8 +21,13 @@ VERTEX_PROJECT_ID = getattr(settings, 'VERTEX_PROJECT_ID', '')
 VERTEX_LOCATION = getattr(settings, 'VERTEX_LOCATION', 'us-central1')
 
 
+@functools.lru_cache(maxsize=1)
 def get_ai_client():
-    """Retorna o client apropriado baseado na configuração."""
+    """
+    Retorna o client apropriado baseado na configuração.
+    Um único client por processo: o pool HTTP (e o TLS) é reaproveitado entre
+    chamadas. Falhas de configuração não ficam em cache.
+    """
     if USE_VERTEX_AI:
         return _get_vertex_client()
     return _get_gemini_client()
@@ -0,0 +1,88 @@
+# chat/services/bootstrap_cache.py
+"""
+Cache do payload de ChatBootstrapView por (usuário, bot), com uma segunda
+camada por bot (dados do bot, sem conversationId), compartilhada entre usuários.
+A invalidação por bot usa uma versão no cache (incrementada quando o bot muda),
+já que o backend de cache padrão do Django não suporta apagar por padrão de chave.
+A versão é gravada junto do payload, então invalidar um usuário é um único DELETE.
+"""
+
+import logging
+from typing import Optional, Tuple
+
+from django.conf import settings
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+# Toda troca de chat ativo e toda edição do bot invalidam o payload,
+# então o TTL só limita entradas órfãs
+BOOTSTRAP_CACHE_TTL = getattr(settings, 'BOOTSTRAP_CACHE_TTL', 300)
+
+
+def _version_key(bot_id: int) -> str:
+    return f"bootstrap:version:{bot_id}"
+
+
+def _payload_key(user_id: int, bot_id: int) -> str:
+    return f"bootstrap:{bot_id}:{user_id}"
+
+
+def _bot_key(bot_id: int) -> str:
+    return f"bootstrap:bot:{bot_id}"
+
+
+def get_payload(user_id: int, bot_id: int) -> Tuple[Optional[dict], int, Optional[dict]]:
+    """
+    Lê versão do bot, payload do usuário e dados do bot num único get_many
+    (MGET no Redis). Retorna (payload, versão atual do bot, dados do bot).
+    Entradas são guardadas junto da versão em que foram geradas e descartadas
+    se o bot mudou desde então; a versão retornada deve ser repassada ao
+    set_payload.
+    """
+    version_key = _version_key(bot_id)
+    payload_key = _payload_key(user_id, bot_id)
+    bot_key = _bot_key(bot_id)
+    try:
+        values = cache.get_many([version_key, payload_key, bot_key])
+    except Exception as e:
+        logger.warning(f"[BootstrapCache] Falha ao ler cache: {e}")
+        return None, 0, None
+
+    version = values.get(version_key, 0)
+
+    def current(key):
+        entry = values.get(key)
+        return entry[1] if entry is not None and entry[0] == version else None
+
+    return current(payload_key), version, current(bot_key)
+
+
+def set_payload(user_id: int, bot_id: int, payload: dict, version: int, bot_data: Optional[dict] = None) -> None:
+    """Grava o payload (e os dados do bot, se informados) marcados com a versão lida antes de montá-los."""
+    entries = {_payload_key(user_id, bot_id): (version, payload)}
+    if bot_data is not None:
+        entries[_bot_key(bot_id)] = (version, bot_data)
+    try:
+        cache.set_many(entries, BOOTSTRAP_CACHE_TTL)
+    except Exception as e:
+        logger.warning(f"[BootstrapCache] Falha ao gravar cache: {e}")
+
+
+def invalidate_user_bot(user_id: int, bot_id: int) -> None:
+    """Descarta o payload de um usuário (ex.: o chat ativo mudou)."""
+    try:
+        cache.delete(_payload_key(user_id, bot_id))
+    except Exception as e:
+        logger.warning(f"[BootstrapCache] Falha ao invalidar cache: {e}")
+
+
+def invalidate_bot(bot_id: int) -> None:
+    """Descarta os payloads de todos os usuários de um bot."""
+    key = _version_key(bot_id)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, 1, None)
+    except Exception as e:
+        logger.warning(f"[BootstrapCache] Falha ao invalidar bot {bot_id}: {e}")
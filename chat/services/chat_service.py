@@ -8,17 +8,20 @@ Atualizado para conectar a flag allow_web_search do Bot ao fluxo de Prompt e Too
 import os
 import json
 import re
+import asyncio
 import mimetypes
+import shutil
 import threading
 import logging
 import tempfile
 import uuid
+import orjson
 
 import time
 
 from datetime import datetime
-from django.utils import timezone
-from django.db import transaction
+from django.conf import settings
+from django.db import transaction, connection
 from django.core.files import File
 
 from google.genai import types
@@ -33,6 +36,7 @@ from .context_builder import (
     get_recent_attachment_context
 )
 from .memory_service import process_memory_background
+from . import response_cache
 from .tts_service import generate_tts_audio
 from .transcription_service import transcribe_audio_gemini
 
@@ -43,6 +47,21 @@ vector_service = VectorService()
 # Instância global do serviço de imagem
 image_service = ImageGenerationService()
 
+# Pausa entre chunks do SSE (typing effect). 0 desliga: o texto sai assim que
+# o Gemini entrega e o frontend pode animar por conta própria.
+STREAM_CHUNK_DELAY = getattr(settings, 'STREAM_CHUNK_DELAY', 0.03)
+
+
+# Regex usadas a cada resposta da IA (compiladas uma única vez)
+_FENCE_OPEN_RE = re.compile(r'^```\w*', re.MULTILINE)
+_FENCE_CLOSE_RE = re.compile(r'\s*```$', re.MULTILINE)
+_LIST_ITEM_RE = re.compile(r'(?:^|\n)\s*(?:\d+\.|-)\s*(.+)')
+
+
+def _strip_code_fences(text: str) -> str:
+    """Remove cercas de markdown (```json ... ```) em volta de um JSON."""
+    return _FENCE_CLOSE_RE.sub('', _FENCE_OPEN_RE.sub('', text)).strip()
+
 
 def _parse_ai_response(response_text: str) -> dict:
     """
@@ -61,8 +80,7 @@ def _parse_ai_response(response_text: str) -> dict:
         result['content'] = parts[0].strip()
         try:
             json_text = parts[1].strip()
-            json_text = re.sub(r'^```\w*', '', json_text, flags=re.MULTILINE)
-            json_text = re.sub(r'\s*```$', '', json_text, flags=re.MULTILINE).strip()
+            json_text = _strip_code_fences(json_text)
             suggestions = json.loads(json_text)
             if isinstance(suggestions, list):
                 result['suggestions'] = [str(s) for s in suggestions][:3]
@@ -71,8 +89,7 @@ def _parse_ai_response(response_text: str) -> dict:
             
     elif text.startswith('{') or text.startswith('```json'):
         try:
-            cleaned = re.sub(r'^```\w*', '', text, flags=re.MULTILINE)
-            cleaned = re.sub(r'\s*```$', '', cleaned, flags=re.MULTILINE).strip()
+            cleaned = _strip_code_fences(text)
             data = json.loads(cleaned)
             if isinstance(data, dict):
                 result['content'] = data.get('response', data.get('content', ''))
@@ -86,7 +103,7 @@ def _parse_ai_response(response_text: str) -> dict:
         parts = text.split(sep)
         result['content'] = parts[0].strip()
         if len(parts) > 1:
-            sugs = re.findall(r'(?:^|\n)\s*(?:\d+\.|-)\s*(.+)', parts[1])
+            sugs = _LIST_ITEM_RE.findall(parts[1])
             result['suggestions'] = [s.strip() for s in sugs[:3] if s.strip()]
     else:
         result['content'] = text
@@ -94,6 +111,42 @@ def _parse_ai_response(response_text: str) -> dict:
     return result
 
 
+def attach_local_file(field_file, src_path: str, filename: str) -> None:
+    """
+    Anexa um arquivo local a um FileField (sem salvar o model) e remove a origem.
+    Se a origem estiver no mesmo filesystem do storage, o arquivo é apenas
+    movido (rename), sem reler nem copiar os bytes.
+    """
+    storage = field_file.storage
+    name = field_file.field.generate_filename(field_file.instance, filename)
+    try:
+        name = storage.get_available_name(name, max_length=field_file.field.max_length)
+        dest_path = storage.path(name)
+        dest_dir = os.path.dirname(dest_path)
+        os.makedirs(dest_dir, exist_ok=True)
+        if os.stat(src_path).st_dev == os.stat(dest_dir).st_dev:
+            shutil.move(src_path, dest_path)
+            # rename preserva o modo da origem (0600 em arquivos temporários);
+            # aplica o mesmo FILE_UPLOAD_PERMISSIONS que o storage usaria
+            permissions_mode = getattr(storage, 'file_permissions_mode', None)
+            if permissions_mode is not None:
+                os.chmod(dest_path, permissions_mode)
+            field_file.name = name
+            return
+    except NotImplementedError:
+        # Storage remoto (sem path local): usa a cópia padrão
+        pass
+
+    try:
+        with open(src_path, 'rb') as f:
+            field_file.save(filename, File(f), save=False)
+    finally:
+        try:
+            os.unlink(src_path)
+        except OSError:
+            pass
+
+
 def generate_suggestions_for_bot(prompt: str):
     """Gera sugestões iniciais para um bot baseado no prompt."""
     try:
@@ -112,8 +165,7 @@ Bot Instructions: "{prompt}"
             )
         )
         text_content = response.text if response.text else "[]"
-        cleaned_response = re.sub(r'^```\w*', '', text_content, flags=re.MULTILINE)
-        cleaned_response = re.sub(r'\s*```$', '', cleaned_response, flags=re.MULTILINE).strip()
+        cleaned_response = _strip_code_fences(text_content)
         suggestions = json.loads(cleaned_response)
         if (isinstance(suggestions, list) and len(suggestions) > 0):
             return suggestions[:3]
@@ -152,7 +204,8 @@ def get_ai_response(
                 return {
                     'content': f"Erro ao gerar imagem: {str(img_err)}.",
                     'suggestions': [],
-                    'audio_path': None
+                    'audio_path': None,
+                    'error': True
                 }
 
         # FLUXO DE TEXTO
@@ -244,19 +297,46 @@ def get_ai_response(
 
     except Exception as e:
         logger.error(f"Erro AI Service: {e}")
-        return {'content': "Erro ao processar resposta.", 'suggestions': [], 'audio_path': None}
+        return {'content': "Erro ao processar resposta.", 'suggestions': [], 'audio_path': None, 'error': True}
+
+
+def _sse_event(payload: dict) -> bytes:
+    """Serializa um evento SSE direto em bytes (orjson já devolve bytes UTF-8)."""
+    return b"data: " + orjson.dumps(payload) + b"\n\n"
+
+
+def _save_stream_reply(chat, content: str, suggestions: list) -> ChatMessage:
+    """Persiste a resposta do stream e atualiza last_message_at do chat."""
+    ai_message = ChatMessage.objects.create(
+        chat=chat,
+        role=ChatMessage.Role.ASSISTANT,
+        content=content,
+        suggestion1=suggestions[0] if len(suggestions) > 0 else None,
+        suggestion2=suggestions[1] if len(suggestions) > 1 else None,
+    )
+    chat.last_message_at = ai_message.created_at
+    chat.save(update_fields=['last_message_at'])
+    return ai_message
+
+
+def _stream_end_event(ai_message: ChatMessage, suggestions: list) -> bytes:
+    return _sse_event({
+        'type': 'end',
+        'message_id': ai_message.id,
+        'clean_content': ai_message.content,
+        'suggestions': suggestions
+    })
 
 
 def process_message_stream(user_id: int, chat_id: int, user_message_text: str):
     """
-    Generator que processa a mensagem e envia chunks via SSE.
+    Generator que processa a mensagem e envia chunks via SSE (bytes).
     Intercepta |||SUGGESTIONS||| para não mostrar ao usuário, fazendo parse do JSON no final.
     """
     
     # Constantes de controle
     SEPARATOR = '|||SUGGESTIONS|||'
     SEPARATOR_LEN = len(SEPARATOR)
-    CHUNK_DELAY = 0.03  # Ajustado para typing effect suave
     
     # Variáveis de estado
     buffer = ""
@@ -272,7 +352,24 @@ def process_message_stream(user_id: int, chat_id: int, user_message_text: str):
         allow_web_search = getattr(bot, 'allow_web_search', False)
         strict_context = getattr(bot, 'strict_context', False)
 
-        yield f"data: {json.dumps({'type': 'start', 'status': 'processing'})}\n\n"
+        yield _sse_event({'type': 'start', 'status': 'processing'})
+
+        # Pergunta repetida: mesma resposta do cache, sem chamar o Gemini.
+        # A mensagem do usuário já foi salva e não é resposta nem anexo, então
+        # o marcador é o ponto da conversa anterior a ela. Só o cache exato:
+        # a busca vetorial custaria um embedding antes do primeiro token num miss
+        cache_marker = None
+        cached = None
+        if bot.cacheable and response_cache.is_cacheable(user_message_text):
+            cache_marker = response_cache.context_marker(chat_id)
+            cached = response_cache.lookup(
+                chat.user_id, bot.id, chat_id, cache_marker, user_message_text, semantic=False
+            )
+        if cached:
+            ai_message = _save_stream_reply(chat, cached['content'], cached['suggestions'])
+            yield _sse_event({'type': 'chunk', 'text': cached['content']})
+            yield _stream_end_event(ai_message, cached['suggestions'])
+            return
 
         # --- Preparação do Contexto (Igual ao síncrono) ---
         user_defined_prompt = bot.prompt.strip() if bot.prompt else "Você é um assistente útil."
@@ -336,8 +433,9 @@ def process_message_stream(user_id: int, chat_id: int, user_message_text: str):
                     # Envia o restante do texto que veio antes do separador
                     if text_part:
                         full_clean_content += text_part
-                        yield f"data: {json.dumps({'type': 'chunk', 'text': text_part})}\n\n"
-                        time.sleep(CHUNK_DELAY)
+                        yield _sse_event({'type': 'chunk', 'text': text_part})
+                        if STREAM_CHUNK_DELAY:
+                            time.sleep(STREAM_CHUNK_DELAY)
 
                     # Muda o estado
                     is_collecting_suggestions = True
@@ -351,23 +449,23 @@ def process_message_stream(user_id: int, chat_id: int, user_message_text: str):
                         buffer = buffer[-SEPARATOR_LEN:] # Mantém o final para a próxima iteração
                         
                         full_clean_content += safe_chunk
-                        yield f"data: {json.dumps({'type': 'chunk', 'text': safe_chunk})}\n\n"
-                        time.sleep(CHUNK_DELAY)
+                        yield _sse_event({'type': 'chunk', 'text': safe_chunk})
+                        if STREAM_CHUNK_DELAY:
+                            time.sleep(STREAM_CHUNK_DELAY)
         
         # --- Finalização do Loop ---
         
         # 1. Se sobrou algo no buffer e NÃO estávamos coletando sugestões, é texto final
         if buffer and not is_collecting_suggestions:
             full_clean_content += buffer
-            yield f"data: {json.dumps({'type': 'chunk', 'text': buffer})}\n\n"
+            yield _sse_event({'type': 'chunk', 'text': buffer})
 
         # 2. Processa as sugestões acumuladas
         final_suggestions = []
         if suggestions_json_str:
             try:
                 # Limpeza de markdown caso a IA tenha colocado ```json ... ```
-                cleaned_json = re.sub(r'^```\w*', '', suggestions_json_str, flags=re.MULTILINE)
-                cleaned_json = re.sub(r'\s*```$', '', cleaned_json, flags=re.MULTILINE).strip()
+                cleaned_json = _strip_code_fences(suggestions_json_str)
                 parsed = json.loads(cleaned_json)
                 if isinstance(parsed, list):
                     final_suggestions = [str(s) for s in parsed][:3]
@@ -378,25 +476,16 @@ def process_message_stream(user_id: int, chat_id: int, user_message_text: str):
 
         # 3. Salva no Banco de Dados
         if full_clean_content:
-            ai_message = ChatMessage.objects.create(
-                chat=chat,
-                role=ChatMessage.Role.ASSISTANT,
-                content=full_clean_content,
-                suggestion1=final_suggestions[0] if len(final_suggestions) > 0 else None,
-                suggestion2=final_suggestions[1] if len(final_suggestions) > 1 else None,
-            )
-
-            chat.last_message_at = timezone.now()
-            chat.save()
+            ai_message = _save_stream_reply(chat, full_clean_content, final_suggestions)
 
             # 4. Envia evento final para o frontend fechar conexão
-            end_payload = {
-                'type': 'end',
-                'message_id': ai_message.id,
-                'clean_content': full_clean_content,
-                'suggestions': final_suggestions
-            }
-            yield f"data: {json.dumps(end_payload)}\n\n"
+            yield _stream_end_event(ai_message, final_suggestions)
+
+            if cache_marker is not None:
+                response_cache.store_in_background(
+                    chat.user_id, bot.id, chat_id, cache_marker, user_message_text,
+                    {'content': full_clean_content, 'suggestions': final_suggestions}
+                )
 
             # 5. Memória em background
             if len(full_clean_content) > 10:
@@ -405,11 +494,39 @@ def process_message_stream(user_id: int, chat_id: int, user_message_text: str):
                     args=(chat.user_id, bot.id, user_message_text, full_clean_content)
                 ).start()
         else:
-            yield f"data: {json.dumps({'type': 'error', 'detail': 'No content generated'})}\n\n"
+            yield _sse_event({'type': 'error', 'detail': 'No content generated'})
 
     except Exception as e:
         logger.error(f"[Stream Error] {e}", exc_info=True)
-        yield f"data: {json.dumps({'type': 'error', 'detail': str(e)})}\n\n"
+        yield _sse_event({'type': 'error', 'detail': str(e)})
+
+
+async def process_message_stream_async(user_id: int, chat_id: int, user_message_text: str):
+    """
+    Versão assíncrona de process_message_stream para views async (ASGI).
+    O generator síncrono (Gemini + ORM) roda numa thread dedicada e os eventos
+    SSE chegam ao event loop já em bytes.
+    """
+    loop = asyncio.get_running_loop()
+    queue = asyncio.Queue()
+    done = object()
+
+    def produce():
+        try:
+            for event in process_message_stream(user_id, chat_id, user_message_text):
+                loop.call_soon_threadsafe(queue.put_nowait, event)
+        finally:
+            # Thread fora do ciclo de request: fecha a conexão aberta pelo ORM
+            connection.close()
+            loop.call_soon_threadsafe(queue.put_nowait, done)
+
+    threading.Thread(target=produce, daemon=True).start()
+
+    while True:
+        event = await queue.get()
+        if event is done:
+            break
+        yield event
 
 
 def _get_smart_context(
@@ -465,8 +582,6 @@ def handle_voice_message(chat_id: int, user_audio_file, reply_with_audio: bool,
             attachment_type='audio',
             original_filename=user_audio_file.name or "voice_message.m4a"
         )
-        chat.last_message_at = timezone.now()
-        chat.save()
 
         ai_response_data = get_ai_response(
             chat_id,
@@ -497,18 +612,17 @@ def handle_voice_message(chat_id: int, user_audio_file, reply_with_audio: bool,
 
         elif audio_path and os.path.exists(audio_path):
             try:
-                with open(audio_path, 'rb') as f:
-                    filename = f"reply_tts_{uuid.uuid4().hex[:10]}.wav"
-                    ai_message.attachment.save(filename, File(f), save=False)
-                    ai_message.attachment_type = 'audio'
-                    ai_message.original_filename = "voice_reply.wav"
-                os.remove(audio_path)
+                filename = f"reply_tts_{uuid.uuid4().hex[:10]}.wav"
+                attach_local_file(ai_message.attachment, audio_path, filename)
+                ai_message.attachment_type = 'audio'
+                ai_message.original_filename = "voice_reply.wav"
             except Exception as e:
                 logger.error(f"[Handle Voice] Erro ao anexar áudio: {e}")
                 ai_message.attachment_type = None
 
         ai_message.save()
-        chat.last_message_at = timezone.now()
-        chat.save()
+        # Uma única escrita no chat (tudo roda na mesma transação)
+        chat.last_message_at = ai_message.created_at
+        chat.save(update_fields=['last_message_at'])
 
         return {"user_message": user_message, "ai_message": ai_message}
\ No newline at end of file
@@ -0,0 +1,132 @@
+# chat/services/ingestion_service.py
+"""
+Indexação RAG de anexos e fontes do chat.
+Executada fora do ciclo da requisição (thread em background) para que o
+upload responda assim que os arquivos forem salvos.
+"""
+
+import logging
+from typing import List, Tuple
+
+from django.db import connection
+
+from studio.models import KnowledgeSource
+
+from ..models import ChatMessage
+from ..file_processor import FileProcessor
+from ..vector_service import vector_service
+
+logger = logging.getLogger(__name__)
+
+# Tipos de documento que passam pela extração de texto + indexação
+PROCESSABLE_MIMES = (
+    'application/pdf',
+    'application/vnd.openxmlformats-officedocument.wordprocessingml.document',
+    'text/plain',
+)
+
+
+def process_attachments_rag_background(attachments: List[Tuple[int, str]]) -> None:
+    """
+    Extrai o texto dos anexos de um upload, indexa todos os chunks num único
+    lote no VectorService e atualiza o rag_status de cada mensagem.
+
+    Args:
+        attachments: Lista de tuplas (message_id, mime_type).
+    """
+    try:
+        _index_attachments(attachments)
+    finally:
+        # Thread fora do ciclo de request: fecha a conexão aberta pelo ORM
+        connection.close()
+
+
+def _index_attachments(attachments: List[Tuple[int, str]]) -> None:
+    mime_by_id = dict(attachments)
+    messages = list(
+        ChatMessage.objects.select_related('chat').only(
+            'id', 'attachment', 'original_filename', 'chat__user_id', 'chat__bot_id'
+        ).filter(id__in=mime_by_id.keys())
+    )
+    if not messages:
+        logger.warning(f"[RAG] Mensagens {list(mime_by_id)} não encontradas para indexação.")
+        return
+
+    updates = {}
+    documents = []
+    for message in messages:
+        updates[message.pk] = {'rag_status': 'indexed'}
+        try:
+            logger.info(f"[RAG] Processando: {message.original_filename}")
+            text = FileProcessor.extract_text(message.attachment.path, mime_by_id[message.pk])
+            if text:
+                updates[message.pk]['extracted_text'] = text
+                chunks = FileProcessor.chunk_text(text)
+                if chunks:
+                    documents.append({
+                        'chunks': chunks,
+                        'source_name': message.original_filename,
+                        'message_id': message.pk
+                    })
+        except Exception as rag_error:
+            logger.error(f"[RAG ERROR] {message.original_filename}: {rag_error}")
+            updates[message.pk] = {'rag_status': 'failed'}
+
+    # Todos os anexos de um upload pertencem ao mesmo chat
+    if documents:
+        chat = messages[0].chat
+        vector_service.add_document_chunks_bulk(
+            user_id=chat.user_id,
+            bot_id=chat.bot_id,
+            documents=documents
+        )
+
+    # Um UPDATE por mensagem, sem passar pelo save() do model
+    for pk, fields in updates.items():
+        ChatMessage.objects.filter(pk=pk).update(**fields)
+
+
+def process_chat_source_background(source_id: int, user_id: int, bot_id: int) -> None:
+    """
+    Extrai o texto de uma KnowledgeSource vinculada ao chat (arquivo ou URL),
+    indexa os chunks no VectorService e atualiza o rag_status da fonte.
+    """
+    try:
+        _index_chat_source(source_id, user_id, bot_id)
+    finally:
+        # Thread fora do ciclo de request: fecha a conexão aberta pelo ORM
+        connection.close()
+
+
+def _index_chat_source(source_id: int, user_id: int, bot_id: int) -> None:
+    source = KnowledgeSource.objects.filter(pk=source_id).only(
+        'id', 'title', 'source_type', 'file', 'url'
+    ).first()
+    if source is None:
+        logger.warning(f"[RAG] Fonte {source_id} não encontrada para indexação.")
+        return
+
+    fields = {'rag_status': 'indexed'}
+    try:
+        extracted_text = ""
+        if source.source_type == KnowledgeSource.SourceType.FILE and source.file:
+            extracted_text = FileProcessor.extract_text(source.file.path)
+        elif source.url:
+            from .content_extractor import ContentExtractor
+            extracted_text = ContentExtractor.extract_from_url(source.url)
+
+        if extracted_text:
+            fields['extracted_text'] = extracted_text
+            chunks = FileProcessor.chunk_text(extracted_text)
+            if chunks:
+                vector_service.add_document_chunks(
+                    user_id=user_id,
+                    bot_id=bot_id,
+                    chunks=chunks,
+                    source_name=source.title
+                )
+    except Exception as e:
+        logger.error(f"[RAG ERROR] Fonte {source_id}: {e}")
+        fields = {'rag_status': 'failed'}
+
+    KnowledgeSource.objects.filter(pk=source_id).update(**fields)
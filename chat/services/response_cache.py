@@ -0,0 +1,191 @@
+# chat/services/response_cache.py
+"""
+Cache de respostas da IA.
+Perguntas idênticas (após normalização) são servidas direto do cache do Django;
+perguntas quase idênticas (similaridade cosseno alta) reutilizam a resposta
+anterior via busca vetorial. Em ambos os casos o LLM não é chamado.
+
+O escopo de uma entrada é o usuário, o bot, o chat e o ponto da conversa
+(última resposta do assistente ou anexo enviado): uma resposta nunca é
+reaproveitada em outra conversa nem depois que o contexto mudou.
+"""
+
+import re
+import json
+import time
+import hashlib
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Q
+
+from ..models import ChatMessage
+from ..vector_service import vector_service
+
+logger = logging.getLogger(__name__)
+
+# Similaridade mínima para considerar a pergunta equivalente
+SEMANTIC_CACHE_THRESHOLD = getattr(settings, 'SEMANTIC_CACHE_THRESHOLD', 0.95)
+# Tempo de vida das entradas em segundos
+SEMANTIC_CACHE_TTL = getattr(settings, 'SEMANTIC_CACHE_TTL', 60 * 60 * 24)
+# Perguntas mais curtas que isso quase sempre dependem da conversa ("sim", "e aí?")
+MIN_CACHEABLE_WORDS = 3
+# Intervalo mínimo entre duas limpezas das entradas expiradas no índice vetorial
+SEMANTIC_CACHE_PRUNE_INTERVAL = getattr(settings, 'SEMANTIC_CACHE_PRUNE_INTERVAL', 60 * 60)
+
+# Gravações no cache saem do caminho da resposta, mas com poucas threads:
+# um pico de mensagens enfileira as gravações em vez de abrir uma thread por resposta
+_store_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='response-cache')
+
+# Mensagens que se referem à conversa anterior: a resposta depende do histórico
+_REFERENTIAL_RE = re.compile(
+    r'\b(isso|isto|esse|essa|esses|essas|este|esta|estes|estas|aquilo|anterior|acima'
+    r'|continu[ae]\w*|de novo|novamente|explique mais|fale mais|mais detalhes'
+    r'|e (o|a|os|as) (primeir|segund|terceir|outr|últim)\w*)\b'
+)
+
+
+def _normalize(text: str) -> str:
+    return ' '.join(text.lower().split())
+
+
+def is_cacheable(text: str) -> bool:
+    """Mensagens curtas ou que se referem à conversa nunca passam pelo cache."""
+    if not text or not text.strip():
+        return False
+    normalized = _normalize(text)
+    if len(normalized.split()) < MIN_CACHEABLE_WORDS:
+        return False
+    return _REFERENTIAL_RE.search(normalized) is None
+
+
+def context_marker(chat_id: int, before_id: Optional[int] = None) -> int:
+    """
+    Id da última resposta do assistente ou anexo do chat (0 se não houver).
+    Faz parte da chave: nova resposta ou novo documento invalidam as entradas.
+    before_id recalcula o marcador de uma mensagem antiga (regerar).
+    """
+    qs = ChatMessage.objects.filter(chat_id=chat_id).filter(
+        Q(role=ChatMessage.Role.ASSISTANT) | (Q(attachment__isnull=False) & ~Q(attachment=''))
+    )
+    if before_id is not None:
+        qs = qs.filter(id__lt=before_id)
+    return qs.order_by('-id').values_list('id', flat=True).first() or 0
+
+
+def _exact_key(user_id: int, bot_id: int, chat_id: int, marker: int, text: str) -> str:
+    """Chave do cache exato; também é o id da entrada no índice vetorial."""
+    digest = hashlib.sha256(
+        f"{user_id}:{bot_id}:{chat_id}:{marker}:{_normalize(text)}".encode('utf-8')
+    ).hexdigest()[:32]
+    return f"ai:{digest}"
+
+
+def _scope(user_id: int, bot_id: int, chat_id: int, marker: int) -> dict:
+    return {
+        'user_id': str(user_id),
+        'bot_id': str(bot_id),
+        'chat_id': str(chat_id),
+        'context': str(marker)
+    }
+
+
+def _as_response(data: dict) -> dict:
+    return {
+        'content': data.get('content', ''),
+        'suggestions': data.get('suggestions', []),
+        'audio_path': None,
+        'duration_ms': 0
+    }
+
+
+def lookup(
+    user_id: int, bot_id: int, chat_id: int, marker: int, text: str, semantic: bool = True
+) -> Optional[dict]:
+    """
+    Retorna os dados de resposta em cache ({content, suggestions}) ou None.
+    semantic=False consulta só o cache exato, sem gerar embedding.
+    """
+    if not is_cacheable(text):
+        return None
+
+    exact = cache.get(_exact_key(user_id, bot_id, chat_id, marker, text))
+    if exact is not None:
+        logger.info(f"[ResponseCache] HIT exato bot {bot_id}")
+        return _as_response(exact)
+
+    if not semantic:
+        return None
+
+    hit = vector_service.search_cached_response(
+        _scope(user_id, bot_id, chat_id, marker), text.strip(), time.time() - SEMANTIC_CACHE_TTL
+    )
+    if not hit:
+        return None
+
+    similarity, meta = hit
+    if similarity < SEMANTIC_CACHE_THRESHOLD:
+        return None
+
+    if time.time() - meta.get('created_ts', 0) > SEMANTIC_CACHE_TTL:
+        return None
+
+    try:
+        data = json.loads(meta.get('response', ''))
+    except (TypeError, ValueError):
+        return None
+
+    logger.info(f"[SemanticCache] HIT bot {bot_id} (similaridade {similarity:.3f})")
+    return _as_response(data)
+
+
+def store(user_id: int, bot_id: int, chat_id: int, marker: int, text: str, response_data: dict) -> None:
+    """
+    Salva uma resposta de texto no cache. Respostas com mídia não são cacheadas.
+    marker deve ser o mesmo usado no lookup (antes da resposta ser salva).
+    """
+    if not is_cacheable(text) or not response_data.get('content'):
+        return
+    if response_data.get('error') or response_data.get('audio_path') or response_data.get('generated_image_path'):
+        return
+
+    data = {
+        'content': response_data['content'],
+        'suggestions': response_data.get('suggestions', [])
+    }
+    key = _exact_key(user_id, bot_id, chat_id, marker, text)
+    # Já gravada (mesma pergunta respondida em paralelo): não gera outro embedding
+    if not cache.add(key, data, SEMANTIC_CACHE_TTL):
+        return
+    vector_service.add_cached_response(key, _scope(user_id, bot_id, chat_id, marker), text.strip(), json.dumps(data))
+    prune_expired()
+
+
+def store_in_background(*args) -> None:
+    """Agenda store() no executor do cache; mesmos argumentos de store()."""
+    def run():
+        try:
+            store(*args)
+        except Exception as e:
+            logger.error(f"[ResponseCache] Erro ao salvar resposta: {e}")
+
+    _store_executor.submit(run)
+
+
+def prune_expired() -> None:
+    """Apaga do índice vetorial as entradas vencidas, no máximo uma vez por intervalo."""
+    if not cache.add('ai:prune', 1, SEMANTIC_CACHE_PRUNE_INTERVAL):
+        return
+    vector_service.prune_cached_responses(time.time() - SEMANTIC_CACHE_TTL)
+
+
+def evict(user_id: int, bot_id: int, chat_id: int, marker: int, text: str) -> None:
+    """Descarta a resposta em cache de uma pergunta (ex: o usuário pediu para regerar)."""
+    if not is_cacheable(text):
+        return
+    key = _exact_key(user_id, bot_id, chat_id, marker, text)
+    cache.delete(key)
+    vector_service.delete_cached_response(key)
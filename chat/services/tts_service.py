@@ -9,10 +9,17 @@ from .ai_client import get_ai_client
 logger = logging.getLogger(__name__)
 
 
-def generate_tts_audio(message_text: str, output_path: str, voice_name: str = "Kore") -> dict:
+# Formato PCM devolvido pelo modelo de TTS
+TTS_CHANNELS = 1
+TTS_SAMPLE_WIDTH = 2
+TTS_FRAME_RATE = 24000
+
+
+def generate_tts_audio(message_text: str, output_path, voice_name: str = "Kore") -> dict:
     """
     Gera áudio TTS usando Gemini e calcula a duração do arquivo WAV.
     Agora suporta escolha de voz (e.g., 'Kore', 'Puck', 'Fenrir').
+    output_path pode ser um caminho ou um buffer binário gravável (ex: BytesIO).
     """
     try:
         client = get_ai_client()
@@ -47,16 +54,14 @@ def generate_tts_audio(message_text: str, output_path: str, voice_name: str = "K
 
         # Salva como WAV
         with wave.open(output_path, 'wb') as wf:
-            wf.setnchannels(1)
-            wf.setsampwidth(2)
-            wf.setframerate(24000)
+            wf.setnchannels(TTS_CHANNELS)
+            wf.setsampwidth(TTS_SAMPLE_WIDTH)
+            wf.setframerate(TTS_FRAME_RATE)
             wf.writeframes(audio_part.data)
 
-        # Calcula duração
-        with wave.open(output_path, 'rb') as wf:
-            frames = wf.getnframes()
-            rate = wf.getframerate()
-            duration_ms = int((frames / float(rate)) * 1000)
+        # Calcula duração a partir dos próprios frames, sem reler o arquivo
+        frames = len(audio_part.data) // (TTS_CHANNELS * TTS_SAMPLE_WIDTH)
+        duration_ms = int((frames / float(TTS_FRAME_RATE)) * 1000)
 
         return {'success': True, 'file_path': output_path, 'duration_ms': duration_ms}
 
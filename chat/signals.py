@@ -0,0 +1,14 @@
+# chat/signals.py
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from bots.models import Bot
+
+
+@receiver(post_save, sender=Bot)
+@receiver(post_delete, sender=Bot)
+def invalidate_bot_bootstrap_cache(sender, instance, **kwargs):
+    """O payload de bootstrap expõe dados do bot: descarta ao editar/apagar."""
+    # Import tardio: chat.services inicializa clientes de IA/vetoriais
+    from .services.bootstrap_cache import invalidate_bot
+    invalidate_bot(instance.id)
@@ -0,0 +1,30 @@
+# chat/tests/test_attach_local_file.py
+import os
+import stat
+import tempfile
+from django.test import SimpleTestCase, override_settings
+
+from chat.models import Chat, ChatMessage
+from chat.services.chat_service import attach_local_file
+
+
+class AttachLocalFileTest(SimpleTestCase):
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.settings_override = override_settings(MEDIA_ROOT=self.media_root, FILE_UPLOAD_PERMISSIONS=0o644)
+        self.settings_override.enable()
+        self.addCleanup(self.settings_override.disable)
+
+    def test_moved_file_gets_upload_permissions(self):
+        # mkstemp cria o arquivo com modo 0600, como os áudios gerados pelo TTS
+        fd, src_path = tempfile.mkstemp(dir=self.media_root, suffix='.mp3')
+        os.write(fd, b'audio')
+        os.close(fd)
+        message = ChatMessage(chat=Chat(id=1))
+
+        attach_local_file(message.attachment, src_path, 'reply.mp3')
+
+        dest_path = message.attachment.path
+        self.assertFalse(os.path.exists(src_path))
+        self.assertEqual(stat.S_IMODE(os.stat(dest_path).st_mode), 0o644)
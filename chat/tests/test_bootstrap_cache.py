@@ -0,0 +1,40 @@
+# chat/tests/test_bootstrap_cache.py
+from django.core.cache import cache
+from django.test import SimpleTestCase
+
+from chat.services import bootstrap_cache
+
+
+class BootstrapCacheTest(SimpleTestCase):
+
+    def setUp(self):
+        cache.clear()
+
+    def test_roundtrip_and_user_invalidation(self):
+        payload, version, _ = bootstrap_cache.get_payload(1, 2)
+        self.assertIsNone(payload)
+
+        bootstrap_cache.set_payload(1, 2, {'conversationId': '10'}, version)
+        self.assertEqual(bootstrap_cache.get_payload(1, 2)[0], {'conversationId': '10'})
+
+        bootstrap_cache.invalidate_user_bot(1, 2)
+        self.assertIsNone(bootstrap_cache.get_payload(1, 2)[0])
+
+    def test_bot_invalidation_discards_payloads_built_before_it(self):
+        _, version, _ = bootstrap_cache.get_payload(1, 2)
+        # O bot muda enquanto o payload está sendo montado
+        bootstrap_cache.invalidate_bot(2)
+        bootstrap_cache.set_payload(1, 2, {'conversationId': '10'}, version)
+
+        self.assertIsNone(bootstrap_cache.get_payload(1, 2)[0])
+
+    def test_bot_data_is_shared_between_users(self):
+        _, version, _ = bootstrap_cache.get_payload(1, 2)
+        bootstrap_cache.set_payload(1, 2, {'conversationId': '10'}, version, {'name': 'Bot'})
+
+        payload, _, bot_data = bootstrap_cache.get_payload(3, 2)
+        self.assertIsNone(payload)
+        self.assertEqual(bot_data, {'name': 'Bot'})
+
+        bootstrap_cache.invalidate_bot(2)
+        self.assertIsNone(bootstrap_cache.get_payload(3, 2)[2])
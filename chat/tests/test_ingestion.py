@@ -123,3 +123,80 @@ class TestIngestion(SimpleTestCase):
         mock_ydl_instance.download.assert_called()
         mock_transcribe_gemini.assert_called()
         mock_rmtree.assert_called_with("/tmp/test", ignore_errors=True)
+
+    # --- Testes da indexação RAG em background ---
+
+    @patch('chat.services.ingestion_service.vector_service')
+    @patch('chat.services.ingestion_service.FileProcessor')
+    @patch('chat.services.ingestion_service.ChatMessage')
+    def test_process_attachments_rag_background_indexes_in_one_batch(self, mock_message_model, mock_processor, mock_vs):
+        """Testa se os anexos são extraídos, indexados num único lote e marcados como 'indexed'."""
+        from chat.services.ingestion_service import process_attachments_rag_background
+
+        messages = []
+        for pk, name in [(7, "a.pdf"), (8, "b.txt")]:
+            message = MagicMock(pk=pk, original_filename=name)
+            message.chat.user_id = 1
+            message.chat.bot_id = 2
+            messages.append(message)
+        mock_message_model.objects.select_related.return_value.only.return_value.filter.return_value = messages
+        mock_processor.extract_text.return_value = "Texto extraído"
+        mock_processor.chunk_text.return_value = ["chunk"]
+
+        process_attachments_rag_background([(7, 'application/pdf'), (8, 'text/plain')])
+
+        mock_vs.add_document_chunks_bulk.assert_called_once_with(
+            user_id=1,
+            bot_id=2,
+            documents=[
+                {'chunks': ["chunk"], 'source_name': "a.pdf", 'message_id': 7},
+                {'chunks': ["chunk"], 'source_name': "b.txt", 'message_id': 8},
+            ]
+        )
+        mock_message_model.objects.filter.return_value.update.assert_called_with(
+            rag_status='indexed', extracted_text="Texto extraído"
+        )
+        self.assertEqual(mock_message_model.objects.filter.return_value.update.call_count, 2)
+
+    @patch('chat.services.ingestion_service.connection')
+    @patch('chat.services.ingestion_service.vector_service')
+    @patch('chat.services.ingestion_service.FileProcessor')
+    @patch('chat.services.ingestion_service.ChatMessage')
+    def test_process_attachments_rag_background_marks_failure(self, mock_message_model, mock_processor, mock_vs, mock_connection):
+        """Testa se erros de extração marcam o anexo como 'failed'."""
+        from chat.services.ingestion_service import process_attachments_rag_background
+
+        message = MagicMock(pk=9, original_filename="doc.pdf")
+        mock_message_model.objects.select_related.return_value.only.return_value.filter.return_value = [message]
+        mock_processor.extract_text.side_effect = Exception("corrupt")
+
+        process_attachments_rag_background([(9, 'application/pdf')])
+
+        mock_message_model.objects.filter.return_value.update.assert_called_once_with(rag_status='failed')
+        mock_vs.add_document_chunks_bulk.assert_not_called()
+        # A thread devolve a conexão do ORM mesmo quando a extração falha
+        mock_connection.close.assert_called_once()
+
+    @patch('chat.services.ingestion_service.connection')
+    @patch('chat.services.ingestion_service.vector_service')
+    @patch('chat.services.ingestion_service.FileProcessor')
+    @patch('chat.services.ingestion_service.KnowledgeSource')
+    def test_process_chat_source_background_indexes_file(self, mock_source_model, mock_processor, mock_vs, mock_connection):
+        """Testa se a fonte do chat é extraída, indexada e marcada como 'indexed'."""
+        from chat.services.ingestion_service import process_chat_source_background
+
+        source = MagicMock(source_type=mock_source_model.SourceType.FILE, title="Apostila")
+        source.file.path = "/tmp/apostila.pdf"
+        mock_source_model.objects.filter.return_value.only.return_value.first.return_value = source
+        mock_processor.extract_text.return_value = "Conteúdo"
+        mock_processor.chunk_text.return_value = ["chunk"]
+
+        process_chat_source_background(5, 1, 2)
+
+        mock_vs.add_document_chunks.assert_called_once_with(
+            user_id=1, bot_id=2, chunks=["chunk"], source_name="Apostila"
+        )
+        mock_source_model.objects.filter.return_value.update.assert_called_once_with(
+            rag_status='indexed', extracted_text="Conteúdo"
+        )
+        mock_connection.close.assert_called_once()
@@ -0,0 +1,209 @@
+# chat/tests/test_response_cache.py
+import json
+import time
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase
+from unittest.mock import MagicMock, patch
+
+from bots.models import Bot
+from chat.models import Chat, ChatMessage
+from chat.services import response_cache
+from chat.vector_service import VectorService
+
+User = get_user_model()
+
+QUESTION = "Qual é a capital da França?"
+
+
+class SemanticResponseCacheTest(SimpleTestCase):
+
+    def setUp(self):
+        cache.clear()
+
+    def _meta(self, created_ts=None):
+        return {
+            'response': json.dumps({'content': 'Resposta', 'suggestions': ['A', 'B']}),
+            'created_ts': created_ts if created_ts is not None else time.time()
+        }
+
+    @patch('chat.services.response_cache.vector_service')
+    def test_lookup_hit_above_threshold(self, mock_vs):
+        mock_vs.search_cached_response.return_value = (0.99, self._meta())
+
+        result = response_cache.lookup(1, 2, 10, 0, QUESTION)
+
+        self.assertEqual(result['content'], 'Resposta')
+        self.assertEqual(result['suggestions'], ['A', 'B'])
+        scope = mock_vs.search_cached_response.call_args.args[0]
+        self.assertEqual(scope['chat_id'], '10')
+        self.assertEqual(scope['context'], '0')
+
+    @patch('chat.services.response_cache.vector_service')
+    def test_lookup_miss_below_threshold(self, mock_vs):
+        mock_vs.search_cached_response.return_value = (0.80, self._meta())
+        self.assertIsNone(response_cache.lookup(1, 2, 10, 0, "Qual é a outra pergunta?"))
+
+    @patch('chat.services.response_cache.vector_service')
+    def test_lookup_ignores_expired_entries(self, mock_vs):
+        expired = time.time() - response_cache.SEMANTIC_CACHE_TTL - 10
+        mock_vs.search_cached_response.return_value = (0.99, self._meta(expired))
+        self.assertIsNone(response_cache.lookup(1, 2, 10, 0, "Uma pergunta bem antiga"))
+
+    @patch('chat.services.response_cache.vector_service')
+    def test_expired_entries_are_filtered_in_the_query(self, mock_vs):
+        """Entradas vencidas não podem mascarar uma duplicata recente."""
+        mock_vs.search_cached_response.return_value = None
+        before = time.time()
+
+        response_cache.lookup(1, 2, 10, 0, QUESTION)
+
+        min_created_ts = mock_vs.search_cached_response.call_args.args[2]
+        self.assertGreaterEqual(min_created_ts, before - response_cache.SEMANTIC_CACHE_TTL)
+
+    @patch('chat.services.response_cache.vector_service')
+    def test_short_and_referential_prompts_are_not_cached(self, mock_vs):
+        for text in ["Sim", "e aí?", "Explique isso melhor por favor", "Continue a partir daqui agora",
+                     "E o segundo item da lista?"]:
+            self.assertFalse(response_cache.is_cacheable(text), text)
+            self.assertIsNone(response_cache.lookup(1, 2, 10, 0, text))
+            response_cache.store(1, 2, 10, 0, text, {'content': 'Resposta'})
+
+        mock_vs.search_cached_response.assert_not_called()
+        mock_vs.add_cached_response.assert_not_called()
+        self.assertTrue(response_cache.is_cacheable(QUESTION))
+
+    @patch('chat.services.response_cache.vector_service')
+    def test_store_skips_errors_and_media(self, mock_vs):
+        response_cache.store(1, 2, 10, 0, QUESTION, {'content': 'Erro', 'error': True})
+        response_cache.store(1, 2, 10, 0, QUESTION, {'content': 'Img', 'generated_image_path': 'x.png'})
+        mock_vs.add_cached_response.assert_not_called()
+
+        response_cache.store(1, 2, 10, 0, QUESTION, {'content': 'Paris', 'suggestions': []})
+        mock_vs.add_cached_response.assert_called_once()
+
+    @patch('chat.services.response_cache.vector_service')
+    def test_store_uses_a_deterministic_id(self, mock_vs):
+        response_cache.store(1, 2, 10, 0, QUESTION, {'content': 'Paris'})
+        first = mock_vs.add_cached_response.call_args.args[0]
+        # Mesma pergunta de novo (após o cache exato sair): upsert sob o mesmo id
+        cache.delete(first)
+        response_cache.store(1, 2, 10, 0, "  qual é a  capital da França? ", {'content': 'Paris'})
+
+        second = mock_vs.add_cached_response.call_args.args[0]
+        self.assertEqual(first, second)
+
+    @patch('chat.services.response_cache.vector_service')
+    def test_concurrent_duplicate_is_not_reindexed(self, mock_vs):
+        response_cache.store(1, 2, 10, 0, QUESTION, {'content': 'Paris'})
+        response_cache.store(1, 2, 10, 0, QUESTION, {'content': 'Paris'})
+
+        mock_vs.add_cached_response.assert_called_once()
+
+    @patch('chat.services.response_cache.vector_service')
+    def test_expired_entries_are_pruned_at_most_once_per_interval(self, mock_vs):
+        response_cache.store(1, 2, 10, 0, QUESTION, {'content': 'Paris'})
+        response_cache.store(1, 2, 11, 0, QUESTION, {'content': 'Paris'})
+
+        mock_vs.prune_cached_responses.assert_called_once()
+        cutoff = mock_vs.prune_cached_responses.call_args.args[0]
+        self.assertLessEqual(cutoff, time.time() - response_cache.SEMANTIC_CACHE_TTL)
+
+    @patch('chat.services.response_cache._store_executor')
+    @patch('chat.services.response_cache.vector_service')
+    def test_store_in_background_uses_the_shared_executor(self, mock_vs, mock_executor):
+        response_cache.store_in_background(1, 2, 10, 0, QUESTION, {'content': 'Paris'})
+
+        mock_executor.submit.assert_called_once()
+        mock_vs.add_cached_response.assert_not_called()
+        # Executa a tarefa agendada
+        mock_executor.submit.call_args.args[0]()
+        mock_vs.add_cached_response.assert_called_once()
+
+    @patch('chat.services.response_cache.vector_service')
+    def test_exact_match_skips_vector_search(self, mock_vs):
+        response_cache.store(1, 2, 10, 0, QUESTION, {'content': 'Paris', 'suggestions': ['A']})
+
+        result = response_cache.lookup(1, 2, 10, 0, "  qual é a  capital da França? ")
+
+        self.assertEqual(result['content'], 'Paris')
+        mock_vs.search_cached_response.assert_not_called()
+        # Outro usuário, outro chat ou outro ponto da conversa não compartilham a entrada
+        mock_vs.search_cached_response.return_value = None
+        self.assertIsNone(response_cache.lookup(3, 2, 10, 0, QUESTION))
+        self.assertIsNone(response_cache.lookup(1, 2, 11, 0, QUESTION))
+        self.assertIsNone(response_cache.lookup(1, 2, 10, 5, QUESTION))
+
+    @patch('chat.services.response_cache.vector_service')
+    def test_evict_drops_exact_and_vector_entries(self, mock_vs):
+        response_cache.store(1, 2, 10, 0, QUESTION, {'content': 'Paris'})
+        entry_id = mock_vs.add_cached_response.call_args.args[0]
+
+        response_cache.evict(1, 2, 10, 0, QUESTION)
+
+        mock_vs.delete_cached_response.assert_called_once_with(entry_id)
+        mock_vs.search_cached_response.return_value = None
+        self.assertIsNone(response_cache.lookup(1, 2, 10, 0, QUESTION))
+
+    def test_semantic_round_trip_with_real_vector_service(self):
+        """Usa a classe real: um método ausente no VectorService quebra o teste."""
+        service = VectorService.__new__(VectorService)  # sem ChromaDB/Gemini
+        service.collection = MagicMock()
+
+        with patch('chat.services.response_cache.vector_service', service), \
+                patch.object(VectorService, '_get_embedding', return_value=[0.1, 0.2]):
+            response_cache.store(1, 2, 10, 0, QUESTION, {'content': 'Paris', 'suggestions': ['A']})
+
+            stored = service.collection.upsert.call_args.kwargs
+            self.assertEqual(stored['metadatas'][0]['type'], 'response_cache')
+            self.assertEqual(stored['metadatas'][0]['chat_id'], '10')
+
+            # Só o cache exato sai: a busca precisa passar pelo índice vetorial
+            cache.clear()
+            service.collection.query.return_value = {
+                'metadatas': [[stored['metadatas'][0]]],
+                'distances': [[0.01]]
+            }
+            result = response_cache.lookup(1, 2, 10, 0, "Qual a capital da França?")
+
+            where = service.collection.query.call_args.kwargs['where']['$and']
+            self.assertIn({'chat_id': '10'}, where)
+            self.assertIn({'context': '0'}, where)
+
+        self.assertEqual(result['content'], 'Paris')
+
+    def test_prune_deletes_only_expired_cache_entries(self):
+        service = VectorService.__new__(VectorService)
+        service.collection = MagicMock()
+
+        service.prune_cached_responses(1000.0)
+
+        where = service.collection.delete.call_args.kwargs['where']['$and']
+        self.assertIn({'type': 'response_cache'}, where)
+        self.assertIn({'created_ts': {'$lt': 1000.0}}, where)
+
+
+class ContextMarkerTest(TestCase):
+
+    def setUp(self):
+        user = User.objects.create(username="markeruser")
+        self.chat = Chat.objects.create(user=user, bot=Bot.objects.create(name="Bot", owner=user))
+
+    def _message(self, role, content='x', **kwargs):
+        return ChatMessage.objects.create(chat=self.chat, role=role, content=content, **kwargs)
+
+    def test_marker_follows_assistant_replies(self):
+        self.assertEqual(response_cache.context_marker(self.chat.id), 0)
+
+        question = self._message(ChatMessage.Role.USER, QUESTION)
+        answer = self._message(ChatMessage.Role.ASSISTANT, 'Paris')
+        self.assertEqual(response_cache.context_marker(self.chat.id), answer.id)
+        # Regerar usa o marcador de antes da pergunta original
+        self.assertEqual(response_cache.context_marker(self.chat.id, before_id=question.id), 0)
+
+    def test_attachment_changes_the_marker(self):
+        answer = self._message(ChatMessage.Role.ASSISTANT, 'Paris')
+        upload = self._message(ChatMessage.Role.USER, attachment='chat_attachments/doc.pdf')
+
+        self.assertNotEqual(answer.id, upload.id)
+        self.assertEqual(response_cache.context_marker(self.chat.id), upload.id)
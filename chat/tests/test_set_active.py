@@ -0,0 +1,39 @@
+# chat/tests/test_set_active.py
+from django.contrib.auth import get_user_model
+from django.db import IntegrityError
+from django.db.models import QuerySet
+from rest_framework.test import APITestCase
+from unittest.mock import patch
+
+from bots.models import Bot
+from chat.models import Chat
+
+User = get_user_model()
+
+
+class SetActiveChatTest(APITestCase):
+
+    def setUp(self):
+        self.user = User.objects.create(username="switcher")
+        self.client.force_authenticate(user=self.user)
+        self.bot = Bot.objects.create(name="TestBot", owner=self.user)
+        self.active = Chat.objects.create(user=self.user, bot=self.bot)
+        self.archived = Chat.objects.create(user=self.user, bot=self.bot, status=Chat.ChatStatus.ARCHIVED)
+
+    def test_swaps_the_active_chat(self):
+        response = self.client.post(f'/api/v1/chats/{self.archived.id}/set-active/')
+
+        self.assertEqual(response.status_code, 200)
+        self.active.refresh_from_db()
+        self.archived.refresh_from_db()
+        self.assertEqual(self.active.status, Chat.ChatStatus.ARCHIVED)
+        self.assertEqual(self.archived.status, Chat.ChatStatus.ACTIVE)
+
+    def test_concurrent_activation_returns_conflict(self):
+        """Violação da constraint de chat ativo único vira 409, não 500."""
+        with patch.object(QuerySet, 'update', side_effect=IntegrityError('one_active_chat_per_user_bot')):
+            response = self.client.post(f'/api/v1/chats/{self.archived.id}/set-active/')
+
+        self.assertEqual(response.status_code, 409)
+        self.archived.refresh_from_db()
+        self.assertEqual(self.archived.status, Chat.ChatStatus.ARCHIVED)
@@ -0,0 +1,62 @@
+# chat/tests/test_stream_cache.py
+import json
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from unittest.mock import patch
+
+from bots.models import Bot
+from chat.models import Chat, ChatMessage
+from chat.services import response_cache
+from chat.services.chat_service import process_message_stream
+
+User = get_user_model()
+
+QUESTION = "Qual é a capital da França?"
+
+
+def _events(stream):
+    return [json.loads(raw[len(b"data: "):]) for raw in stream]
+
+
+@patch('chat.services.response_cache.vector_service')
+class StreamResponseCacheTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create(username="streamuser")
+        self.bot = Bot.objects.create(name="TestBot", owner=self.user, cacheable=True)
+        self.chat = Chat.objects.create(user=self.user, bot=self.bot)
+
+    @patch('chat.services.chat_service.generate_content_stream')
+    def test_exact_hit_is_streamed_without_gemini(self, mock_generate, mock_vs):
+        response_cache.store(
+            self.user.id, self.bot.id, self.chat.id, 0, QUESTION, {'content': 'Paris', 'suggestions': ['A', 'B']}
+        )
+
+        events = _events(process_message_stream(self.user.id, self.chat.id, QUESTION))
+
+        self.assertEqual([e['type'] for e in events], ['start', 'chunk', 'end'])
+        self.assertEqual(events[1]['text'], 'Paris')
+        self.assertEqual(events[2]['suggestions'], ['A', 'B'])
+        self.assertTrue(ChatMessage.objects.filter(id=events[2]['message_id'], content='Paris').exists())
+        mock_generate.assert_not_called()
+
+    @patch('chat.services.chat_service.build_conversation_history', side_effect=RuntimeError('parou'))
+    def test_miss_does_not_embed_before_the_first_token(self, mock_history, mock_vs):
+        """Num miss o SSE segue direto para o Gemini, sem busca vetorial."""
+        events = _events(process_message_stream(self.user.id, self.chat.id, QUESTION))
+
+        self.assertEqual(events[-1]['type'], 'error')
+        mock_history.assert_called_once()
+        mock_vs.search_cached_response.assert_not_called()
+
+    @patch('chat.services.chat_service.build_conversation_history', side_effect=RuntimeError('parou'))
+    def test_bot_without_cacheable_skips_the_cache(self, mock_history, mock_vs):
+        Bot.objects.filter(pk=self.bot.pk).update(cacheable=False)
+        response_cache.store(self.user.id, self.bot.id, self.chat.id, 0, QUESTION, {'content': 'Paris'})
+
+        events = _events(process_message_stream(self.user.id, self.chat.id, QUESTION))
+
+        self.assertNotIn('chunk', [e['type'] for e in events])
+        mock_history.assert_called_once()
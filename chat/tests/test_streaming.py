@@ -0,0 +1,94 @@
+# chat/tests/test_streaming.py
+import asyncio
+import threading
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase
+from rest_framework.test import APITestCase
+from unittest.mock import patch
+
+from bots.models import Bot
+from chat.models import Chat, ChatMessage
+from chat.services.chat_service import process_message_stream_async
+
+User = get_user_model()
+
+
+class AsyncStreamTest(SimpleTestCase):
+
+    @patch('chat.services.chat_service.connection')
+    @patch('chat.services.chat_service.process_message_stream')
+    def test_first_event_arrives_before_generator_finishes(self, mock_stream, mock_connection):
+        release = threading.Event()
+
+        def slow_stream(*args):
+            yield b"data: first\n\n"
+            # Simula o Gemini ainda gerando o resto da resposta
+            release.wait(5)
+            yield b"data: last\n\n"
+        mock_stream.side_effect = slow_stream
+
+        async def consume():
+            stream = process_message_stream_async(1, 2, "Oi")
+            first = await asyncio.wait_for(stream.__anext__(), timeout=2)
+            # O generator continua bloqueado: o primeiro evento não esperou o fim
+            self.assertFalse(release.is_set())
+            release.set()
+            rest = [event async for event in stream]
+            return first, rest
+
+        first, rest = asyncio.run(consume())
+
+        self.assertEqual(first, b"data: first\n\n")
+        self.assertEqual(rest, [b"data: last\n\n"])
+
+
+class MessageListStreamModeTest(APITestCase):
+
+    def setUp(self):
+        self.user = User.objects.create(username="streamer")
+        self.client.force_authenticate(user=self.user)
+        self.bot = Bot.objects.create(name="TestBot", owner=self.user)
+        self.chat = Chat.objects.create(user=self.user, bot=self.bot)
+
+    @patch('chat.views.process_message_stream_async')
+    def test_stream_mode_uses_async_iterator(self, mock_stream):
+        async def events(*args):
+            yield b"data: {}\n\n"
+        mock_stream.side_effect = events
+
+        response = self.client.post(
+            f'/api/v1/chats/{self.chat.id}/messages/',
+            {'content': 'Oi', 'stream': True},
+            format='json'
+        )
+
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        mock_stream.assert_called_once_with(self.user.id, self.chat.id, 'Oi')
+
+
+class StreamViewLastMessageTest(APITestCase):
+
+    def setUp(self):
+        self.user = User.objects.create(username="sseuser")
+        self.bot = Bot.objects.create(name="TestBot", owner=self.user)
+        self.chat = Chat.objects.create(user=self.user, bot=self.bot)
+
+    @patch('chat.views.process_message_stream_async')
+    @patch('chat.views.StreamChatMessageView._authenticate')
+    def test_user_message_bumps_last_message_at(self, mock_auth, mock_stream):
+        mock_auth.return_value = self.user
+
+        async def events(*args):
+            yield b"data: {}\n\n"
+        mock_stream.side_effect = events
+
+        response = self.client.post(
+            f'/api/v1/chats/{self.chat.id}/stream/',
+            data='{"content": "Oi"}',
+            content_type='application/json'
+        )
+
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        user_message = ChatMessage.objects.get(chat=self.chat, role=ChatMessage.Role.USER)
+        self.chat.refresh_from_db()
+        self.assertEqual(self.chat.last_message_at, user_message.created_at)
@@ -0,0 +1,34 @@
+# chat/tests/test_upload_limits.py
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import override_settings
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from bots.models import Bot
+from chat.models import Chat, ChatMessage
+
+User = get_user_model()
+
+
+@override_settings(FILE_UPLOAD_MAX_SIZE=10)
+class AttachmentUploadLimitTest(APITestCase):
+
+    def setUp(self):
+        self.user = User.objects.create(username="uploader")
+        self.client.force_authenticate(user=self.user)
+        self.bot = Bot.objects.create(name="TestBot", owner=self.user)
+        self.chat = Chat.objects.create(user=self.user, bot=self.bot)
+
+    def test_oversized_attachment_is_rejected(self):
+        upload = SimpleUploadedFile("big.txt", b"x" * 100, content_type="text/plain")
+
+        response = self.client.post(
+            f'/api/v1/chats/{self.chat.id}/messages/attach/',
+            {'attachment': upload},
+            format='multipart'
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+        self.assertEqual(response.data['files'], ['big.txt'])
+        self.assertFalse(ChatMessage.objects.filter(chat=self.chat).exists())
@@ -7,8 +7,11 @@ import chromadb
 # Use google.genai instead of google.generativeai
 from google import genai
 from django.conf import settings
+from django.core.cache import cache
+import hashlib
 import logging
 import uuid
+import time
 from datetime import datetime
 import os
 import re
@@ -18,6 +21,21 @@ from enum import Enum
 logger = logging.getLogger(__name__)
 
 
+# Padrões de classificação de query, compilados uma vez numa única alternância
+_COMPARATIVE_RE = re.compile('|'.join([
+    r'\b(compare|comparar|diferença|diferente|versus|vs\.?|entre os)\b',
+    r'\b(os dois|ambos|os documentos|os arquivos)\b',
+    r'\b(primeiro|segundo|terceiro)\s+(documento|arquivo)\b'
+]))
+_REFERENCE_RE = re.compile('|'.join([
+    r'\b(isso|isto|esse|este|essa|esta)\b',
+    r'\b(esse|este|o)\s+(documento|arquivo|pdf|texto)\b',
+    r'\bresuma\s*(isso|isto|esse|este)?\b',
+    r'\bexplique\s*(isso|isto|esse|este)?\b',
+    r'\bo que (é|são|diz|fala)\s*(isso|isto|esse|este)?\b'
+]))
+
+
 class QueryType(Enum):
     """Tipos de query para determinar estratégia de busca."""
     REFERENCE = "reference"      # "o que é isso?", "esse documento"
@@ -30,6 +48,12 @@ class VectorService:
     """
     Gerencia busca vetorial com suporte inteligente a múltiplos documentos.
     """
+
+    EMBEDDING_MODEL = "text-embedding-004"
+    # Máximo de textos por chamada de embedding em lote
+    EMBEDDING_BATCH_SIZE = 100
+    # Embeddings de chunks são determinísticos: cache longo evita re-embedar re-uploads
+    EMBEDDING_CACHE_TTL = 60 * 60 * 24 * 7
     
     def __init__(self):
         self.client: Optional[chromadb.PersistentClient] = None
@@ -86,7 +110,7 @@ class VectorService:
             # If task_type is needed, it might be in config.
 
             response = self.genai_client.models.embed_content(
-                model="text-embedding-004",
+                model=self.EMBEDDING_MODEL,
                 contents=text[:8000],
                 # config=types.EmbedContentConfig(task_type=...) # If needed
             )
@@ -101,6 +125,65 @@ class VectorService:
             logger.error(f"Erro ao gerar embedding: {e}")
             return None
 
+    def _get_embeddings_batch(self, texts: List[str]) -> List[Optional[List[float]]]:
+        """Gera embeddings de vários textos com uma chamada por lote."""
+        embeddings: List[Optional[List[float]]] = [None] * len(texts)
+        valid = [(i, t[:8000]) for i, t in enumerate(texts) if t and len(t.strip()) >= 3]
+
+        for start in range(0, len(valid), self.EMBEDDING_BATCH_SIZE):
+            batch = valid[start:start + self.EMBEDDING_BATCH_SIZE]
+            try:
+                response = self.genai_client.models.embed_content(
+                    model=self.EMBEDDING_MODEL,
+                    contents=[t for _, t in batch],
+                )
+                if not response.embeddings or len(response.embeddings) != len(batch):
+                    logger.error("Resposta de embedding em lote com tamanho inesperado.")
+                    continue
+                for (i, _), emb in zip(batch, response.embeddings):
+                    embeddings[i] = emb.values
+            except Exception as e:
+                logger.error(f"Erro ao gerar embeddings em lote: {e}")
+
+        return embeddings
+
+    def _embedding_cache_key(self, text: str) -> str:
+        digest = hashlib.sha256(text.encode('utf-8')).hexdigest()
+        return f"emb:{self.EMBEDDING_MODEL}:{digest}"
+
+    def _get_embeddings_cached(self, texts: List[str]) -> List[Optional[List[float]]]:
+        """
+        Gera embeddings para vários textos reaproveitando o cache.
+        Apenas os textos ausentes no cache são enviados à API.
+        """
+        keys = [self._embedding_cache_key(t) for t in texts]
+        try:
+            cached = cache.get_many(keys)
+        except Exception as e:
+            logger.warning(f"Cache de embeddings indisponível: {e}")
+            cached = {}
+
+        # Apenas os textos ausentes no cache vão para a API, num único lote
+        missing = [i for i, key in enumerate(keys) if cached.get(key) is None]
+        generated = self._get_embeddings_batch([texts[i] for i in missing]) if missing else []
+
+        to_cache = {}
+        for i, embedding in zip(missing, generated):
+            if embedding:
+                to_cache[keys[i]] = list(embedding)
+        cached.update(to_cache)
+
+        embeddings = [cached.get(key) for key in keys]
+
+        if to_cache:
+            try:
+                cache.set_many(to_cache, timeout=self.EMBEDDING_CACHE_TTL)
+            except Exception as e:
+                logger.warning(f"Falha ao gravar cache de embeddings: {e}")
+
+        logger.debug(f"Embeddings: {len(texts) - len(to_cache)} do cache, {len(to_cache)} gerados")
+        return embeddings
+
     # =========================================================================
     # MÉTODOS DE ADIÇÃO
     # =========================================================================
@@ -139,43 +222,170 @@ class VectorService:
         message_id: Optional[int] = None
     ) -> None:
         """Adiciona chunks de documento com metadados completos."""
-        if not self.collection or not chunks:
+        self.add_document_chunks_bulk(user_id, bot_id, [{
+            'chunks': chunks,
+            'source_name': source_name,
+            'message_id': message_id
+        }])
+
+    def add_document_chunks_bulk(self, user_id: int, bot_id: int, documents: List[Dict]) -> None:
+        """
+        Indexa chunks de vários documentos de uma vez: um lote de embeddings
+        e uma única inserção no ChromaDB.
+
+        Args:
+            documents: Lista de dicts com 'chunks', 'source_name' e 'message_id' (opcional).
+        """
+        documents = [d for d in documents if d.get('chunks')]
+        if not self.collection or not documents:
             return
-        
-        logger.info(f"Indexando {len(chunks)} chunks de '{source_name}'")
-        
+
+        all_chunks = [chunk for d in documents for chunk in d['chunks']]
+        logger.info(f"Indexando {len(all_chunks)} chunks de {len(documents)} documento(s)")
+
+        embeddings = iter(self._get_embeddings_cached(all_chunks))
         docs, embeds, metas, ids = [], [], [], []
         timestamp = datetime.now().isoformat()
-        
-        for i, chunk in enumerate(chunks):
-            embedding = self._get_embedding(chunk)
-            if not embedding:
-                continue
-            
-            docs.append(chunk)
-            embeds.append(embedding)
-            ids.append(str(uuid.uuid4()))
-            metas.append({
-                'user_id': str(user_id),
-                'bot_id': str(bot_id),
-                'type': 'document',
-                'source': source_name,
-                'source_lower': source_name.lower(),  # Para busca case-insensitive
-                'chunk_index': i,
-                'total_chunks': len(chunks),
-                'timestamp': timestamp,
-                'message_id': str(message_id) if message_id else ''
-            })
+
+        for document in documents:
+            chunks = document['chunks']
+            source_name = document['source_name']
+            message_id = document.get('message_id')
+
+            for i, chunk in enumerate(chunks):
+                embedding = next(embeddings)
+                if not embedding:
+                    continue
+
+                docs.append(chunk)
+                embeds.append(embedding)
+                ids.append(str(uuid.uuid4()))
+                metas.append({
+                    'user_id': str(user_id),
+                    'bot_id': str(bot_id),
+                    'type': 'document',
+                    'source': source_name,
+                    'source_lower': source_name.lower(),  # Para busca case-insensitive
+                    'chunk_index': i,
+                    'total_chunks': len(chunks),
+                    'timestamp': timestamp,
+                    'message_id': str(message_id) if message_id else ''
+                })
         
         if docs:
             try:
                 self.collection.add(
                     documents=docs, embeddings=embeds, metadatas=metas, ids=ids
                 )
-                logger.info(f"RAG: {len(docs)} chunks indexados de '{source_name}'")
+                logger.info(f"RAG: {len(docs)} chunks indexados")
             except Exception as e:
                 logger.error(f"Erro ao indexar documento: {e}")
 
+    # =========================================================================
+    # CACHE SEMÂNTICO DE RESPOSTAS
+    # =========================================================================
+
+    def add_cached_response(self, entry_id: str, scope: Dict[str, str], query: str, response_json: str) -> None:
+        """
+        Indexa a pergunta do usuário junto com a resposta serializada da IA.
+        Upsert sob um id determinístico: a mesma pergunta no mesmo escopo
+        substitui a entrada anterior em vez de duplicá-la.
+        """
+        if not self.collection or not query:
+            return
+
+        try:
+            embedding = self._get_embedding(query, "retrieval_query")
+            if not embedding:
+                return
+
+            self.collection.upsert(
+                documents=[query],
+                embeddings=[embedding],
+                metadatas=[{
+                    **scope,
+                    'type': 'response_cache',
+                    'response': response_json,
+                    'created_ts': time.time()
+                }],
+                ids=[entry_id]
+            )
+        except Exception as e:
+            logger.error(f"Erro ao salvar resposta em cache: {e}")
+
+    def search_cached_response(
+        self,
+        scope: Dict[str, str],
+        query: str,
+        min_created_ts: float
+    ) -> Optional[Tuple[float, Dict]]:
+        """
+        Busca a pergunta mais parecida já respondida no mesmo escopo
+        (usuário, bot, chat e ponto da conversa). Entradas criadas antes de
+        min_created_ts são ignoradas, para uma expirada não esconder outra válida.
+
+        Returns:
+            Tuple (similaridade_cosseno, metadados) ou None se não houver entrada.
+        """
+        if not self.collection or not query:
+            return None
+
+        try:
+            embedding = self._get_embedding(query, "retrieval_query")
+            if not embedding:
+                return None
+
+            results = self.collection.query(
+                query_embeddings=[embedding],
+                n_results=1,
+                where={
+                    "$and": [
+                        *({key: value} for key, value in scope.items()),
+                        {"type": "response_cache"},
+                        {"created_ts": {"$gte": min_created_ts}}
+                    ]
+                },
+                include=["metadatas", "distances"]
+            )
+
+            if not results or not results['metadatas'] or not results['metadatas'][0]:
+                return None
+
+            # Coleção usa espaço cosseno: distância = 1 - similaridade
+            similarity = 1.0 - results['distances'][0][0]
+            return similarity, results['metadatas'][0][0]
+
+        except Exception as e:
+            logger.error(f"Erro ao buscar resposta em cache: {e}")
+            return None
+
+    def delete_cached_response(self, entry_id: str) -> None:
+        """Remove uma resposta do cache (ex: o usuário pediu para regerar)."""
+        if not self.collection:
+            return
+
+        try:
+            self.collection.delete(ids=[entry_id])
+        except Exception as e:
+            logger.error(f"Erro ao remover resposta do cache: {e}")
+
+    def prune_cached_responses(self, cutoff_ts: float) -> None:
+        """Apaga as respostas em cache criadas antes de cutoff_ts (já expiradas)."""
+        if not self.collection:
+            return
+
+        try:
+            self.collection.delete(
+                where={
+                    "$and": [
+                        {"type": "response_cache"},
+                        {"created_ts": {"$lt": cutoff_ts}}
+                    ]
+                }
+            )
+        except Exception as e:
+            logger.error(f"Erro ao limpar respostas expiradas do cache: {e}")
+
     # =========================================================================
     # MÉTODOS DE ANÁLISE DE QUERY
     # =========================================================================
@@ -199,23 +409,11 @@ class VectorService:
                 return QueryType.SPECIFIC, source
         
         # 2. Detecta queries comparativas
-        comparative_patterns = [
-            r'\b(compare|comparar|diferença|diferente|versus|vs\.?|entre os)\b',
-            r'\b(os dois|ambos|os documentos|os arquivos)\b',
-            r'\b(primeiro|segundo|terceiro)\s+(documento|arquivo)\b'
-        ]
-        if any(re.search(p, query_lower) for p in comparative_patterns):
+        if _COMPARATIVE_RE.search(query_lower):
             return QueryType.COMPARATIVE, None
         
         # 3. Detecta referências pronominais (documento mais recente)
-        reference_patterns = [
-            r'\b(isso|isto|esse|este|essa|esta)\b',
-            r'\b(esse|este|o)\s+(documento|arquivo|pdf|texto)\b',
-            r'\bresuma\s*(isso|isto|esse|este)?\b',
-            r'\bexplique\s*(isso|isto|esse|este)?\b',
-            r'\bo que (é|são|diz|fala)\s*(isso|isto|esse|este)?\b'
-        ]
-        if any(re.search(p, query_lower) for p in reference_patterns):
+        if _REFERENCE_RE.search(query_lower):
             return QueryType.REFERENCE, None
         
         # 4. Query geral - busca em todos os documentos
@@ -5,22 +5,26 @@ Inclui endpoints REST padrão e SSE para streaming.
 """
 
 import os
-import re
-import json
 import uuid
+import orjson
 import mimetypes
 import logging
+import threading
 from pathlib import Path
 
 from django.conf import settings
-from django.db import transaction
-from django.http import FileResponse, StreamingHttpResponse, JsonResponse
+from django.db import IntegrityError, transaction, connection
+from django.db.models import (
+    Case, CharField, Exists, OuterRef, Prefetch, Q, Value, When, prefetch_related_objects
+)
+from django.http import FileResponse, Http404, StreamingHttpResponse, JsonResponse
 from django.shortcuts import get_object_or_404
 from django.utils import timezone
 from django.utils.decorators import method_decorator
 from django.views import View
 from django.views.decorators.csrf import csrf_exempt
-from django.core.files import File
+
+from asgiref.sync import sync_to_async
 
 from rest_framework import generics, permissions, status, parsers
 from rest_framework.response import Response
@@ -29,32 +33,86 @@ from rest_framework_simplejwt.authentication import JWTAuthentication
 from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
 
 from .models import Chat, ChatMessage
+from .mixins import ChatLookupMixin
 from .serializers import (
     ChatListSerializer,
     ChatMessageSerializer,
     ChatMessageAttachmentSerializer
 )
 from bots.models import Bot
-from studio.models import KnowledgeSource
+from studio.models import KnowledgeSource, StudySpace
 from .services import (
     get_ai_response,
+    attach_local_file,
     transcribe_audio_gemini,
     generate_tts_audio,
     handle_voice_interaction,
     handle_voice_message,
-    process_message_stream
+    process_message_stream_async,
+    response_cache,
+    bootstrap_cache
 )
-from config.pagination import StandardMessagePagination
-from .vector_service import vector_service
-from .file_processor import FileProcessor
+from .services.ingestion_service import (
+    PROCESSABLE_MIMES,
+    process_attachments_rag_background,
+    process_chat_source_background
+)
+from config.pagination import StandardMessageCursorPagination
+from config.upload_handlers import MaxSizeTemporaryFileUploadHandler
 
 logger = logging.getLogger(__name__)
 
+def _split_paragraphs(ai_content):
+    """
+    Divide a resposta da IA em parágrafos (2+ quebras de linha); nunca retorna
+    lista vazia. Usa str.split em C em vez de regex: sequências de 3+ quebras
+    geram pedaços vazios ou com '\n' na ponta, removidos no mesmo passo.
+    """
+    text = ai_content.strip() if ai_content else ""
+    if not text:
+        return ["..."]
+    if '\n\n' not in text:
+        return [text]
+    return [p for p in (chunk.strip('\n') for chunk in text.split('\n\n')) if p]
+
+
+def _suggestion_pair(suggestions):
+    """Retorna (suggestion1, suggestion2) preenchendo com None o que faltar."""
+    s1, s2 = (list(suggestions or []) + [None, None])[:2]
+    return s1, s2
+
+
+def _create_paragraph_messages(chat, paragraphs, suggestions):
+    """
+    Cria uma mensagem do assistente por parágrafo num único INSERT.
+    As sugestões ficam apenas no último parágrafo.
+    """
+    ai_messages = [
+        ChatMessage(chat=chat, role=ChatMessage.Role.ASSISTANT, content=paragraph_content)
+        for paragraph_content in paragraphs
+    ]
+    if ai_messages:
+        ai_messages[-1].suggestion1, ai_messages[-1].suggestion2 = _suggestion_pair(suggestions)
+    # bulk_create preenche created_at (auto_now_add) e os ids nos objetos
+    return ChatMessage.objects.bulk_create(ai_messages)
+
 
 # =============================================================================
 # VIEWS DE LISTAGEM DE CHATS
 # =============================================================================
 
+# Prefetches usados pelo ChatListSerializer (categorias do bot e última mensagem)
+CHAT_LIST_PREFETCHES = (
+    'bot__categories',
+    Prefetch(
+        'messages',
+        # extracted_text (texto integral dos anexos) não é serializado na prévia
+        queryset=ChatMessage.objects.defer('extracted_text').order_by('-created_at')[:1],
+        to_attr='latest_messages'
+    ),
+)
+
+
 class ActiveChatListView(generics.ListAPIView):
     """Lista todos os chats ativos do usuário."""
     serializer_class = ChatListSerializer
@@ -64,6 +122,8 @@ class ActiveChatListView(generics.ListAPIView):
         return Chat.objects.filter(
             user=self.request.user,
             status=Chat.ChatStatus.ACTIVE
+        ).select_related('bot', 'bot__owner').prefetch_related(
+            *CHAT_LIST_PREFETCHES
         ).order_by('-last_message_at')
 
 
@@ -78,6 +138,8 @@ class ArchivedChatListView(generics.ListAPIView):
             user=self.request.user,
             bot_id=bot_id,
             status=Chat.ChatStatus.ARCHIVED
+        ).select_related('bot', 'bot__owner').prefetch_related(
+            *CHAT_LIST_PREFETCHES
         ).order_by('-last_message_at')
 
 
@@ -85,57 +147,86 @@ class ArchivedChatListView(generics.ListAPIView):
 # VIEWS DE BOOTSTRAP E MENSAGENS
 # =============================================================================
 
+def _absolute_media_url(request, url):
+    """
+    Prefixa esquema e host em URLs relativas de mídia.
+    Equivale a build_absolute_uri para caminhos absolutos, sem o parse completo.
+    Com SITE_URL configurado, nem o host do request é consultado.
+    """
+    if url.startswith('/'):
+        return f"{settings.SITE_URL or f'{request.scheme}://{request.get_host()}'}{url}"
+    return url
+
+
 class ChatBootstrapView(APIView):
     """Inicializa ou retorna o chat ativo para um bot."""
     permission_classes = [permissions.IsAuthenticated]
 
     def get(self, request, bot_id):
-        bot = get_object_or_404(Bot, id=bot_id)
-        active_chat = Chat.objects.filter(
+        cached, cache_version, bot_data = bootstrap_cache.get_payload(request.user.id, bot_id)
+        if cached is not None:
+            return Response(cached, status=status.HTTP_200_OK)
+
+        # Dados do bot independem do usuário: vêm do cache por bot quando possível
+        fresh_bot_data = None
+        if bot_data is None:
+            # Só as colunas usadas, como dict: sem instanciar Bot/User
+            row = Bot.objects.filter(id=bot_id).values(
+                'name', 'description', 'avatar_url', 'owner_id', 'owner__username',
+                'suggestion1', 'suggestion2', 'suggestion3'
+            ).first()
+            if row is None:
+                raise Http404
+            avatar_storage = Bot._meta.get_field('avatar_url').storage
+            bot_data = fresh_bot_data = {
+                "name": row['name'],
+                "handle": f"@{row['owner__username']}",
+                # Caminho do storage; o host é prefixado por request
+                "avatar": avatar_storage.url(row['avatar_url']) if row['avatar_url'] else None,
+                "owner_id": row['owner_id'],
+                "welcome": row['description'] or "Hello! How can I help you today?",
+                "suggestions": [s for s in (row['suggestion1'], row['suggestion2'], row['suggestion3']) if s]
+            }
+
+        # A constraint one_active_chat_per_user_bot resolve a corrida entre
+        # requests simultâneos: get_or_create refaz o get no IntegrityError
+        active_chat, _ = Chat.objects.get_or_create(
             user=request.user,
-            bot=bot,
+            bot_id=bot_id,
             status=Chat.ChatStatus.ACTIVE
-        ).first()
-
-        if not active_chat:
-            active_chat = Chat.objects.create(
-                user=request.user,
-                bot=bot,
-                status=Chat.ChatStatus.ACTIVE
-            )
+        )
 
-        # Construir URL do avatar
-        avatar_url_path = None
-        if bot.avatar_url and hasattr(bot.avatar_url, 'url'):
-            try:
-                avatar_url_path = request.build_absolute_uri(bot.avatar_url.url)
-            except Exception:
-                avatar_url_path = bot.avatar_url.url
+        avatar_url_path = _absolute_media_url(request, bot_data["avatar"]) if bot_data["avatar"] else None
 
-        return Response({
+        payload = {
             "conversationId": str(active_chat.id),
             "bot": {
-                "name": bot.name,
-                "handle": f"@{bot.owner.username}",
+                "name": bot_data["name"],
+                "handle": bot_data["handle"],
                 "avatarUrl": avatar_url_path,
                 "avatar_url": avatar_url_path, # Legacy/Consistency alias
-                "createdByMe": bot.owner == request.user # Informa ao frontend se sou o dono
+                "createdByMe": bot_data["owner_id"] == request.user.id # Informa ao frontend se sou o dono
             },
-            "welcome": bot.description or "Hello! How can I help you today?",
-            "suggestions": [s for s in [bot.suggestion1, bot.suggestion2, bot.suggestion3] if s]
-        }, status=status.HTTP_200_OK)
+            "welcome": bot_data["welcome"],
+            "suggestions": bot_data["suggestions"]
+        }
+        bootstrap_cache.set_payload(request.user.id, bot_id, payload, cache_version, fresh_bot_data)
+        return Response(payload, status=status.HTTP_200_OK)
 
 
-class ChatMessageListView(generics.ListCreateAPIView):
+class ChatMessageListView(ChatLookupMixin, generics.ListCreateAPIView):
     """Lista e cria mensagens em um chat (modo não-streaming)."""
     serializer_class = ChatMessageSerializer
     permission_classes = [permissions.IsAuthenticated]
-    pagination_class = StandardMessagePagination
+    pagination_class = StandardMessageCursorPagination
+    # Listagem e envio só usam chat.id/bot_id/status: sem JOIN com bot
+    chat_select_related = ()
 
     def get_queryset(self):
-        chat_id = self.kwargs['chat_pk']
-        get_object_or_404(Chat, id=chat_id, user=self.request.user)
-        return ChatMessage.objects.filter(chat_id=chat_id).order_by('-created_at')
+        chat = self.get_chat()
+        # extracted_text pode ser enorme e não é serializado na listagem
+        # A ordenação vem da paginação por cursor (-created_at, -id)
+        return ChatMessage.objects.filter(chat_id=chat.id).defer('extracted_text')
 
     def create(self, request, *args, **kwargs):
         # Validar Content-Type
@@ -148,29 +239,90 @@ class ChatMessageListView(generics.ListCreateAPIView):
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
 
-        chat_id = self.kwargs['chat_pk']
-        chat = get_object_or_404(Chat, id=chat_id, user=self.request.user)
+        reply_with_audio = request.data.get('reply_with_audio', False)
 
-        if chat.status != Chat.ChatStatus.ACTIVE:
-            return Response(
-                {"detail": "This chat is archived and read-only."},
-                status=status.HTTP_403_FORBIDDEN
+        # Salvar mensagem do usuário com o chat travado: um arquivamento
+        # concorrente não intercala entre a checagem de status e o INSERT.
+        # A chamada à IA fica fora da transação para não segurar a trava.
+        with transaction.atomic():
+            chat = self.get_chat(for_update=True)
+            if chat.status != Chat.ChatStatus.ACTIVE:
+                return Response(
+                    {"detail": "This chat is archived and read-only."},
+                    status=status.HTTP_403_FORBIDDEN
+                )
+            user_message = serializer.save(chat=chat, role=ChatMessage.Role.USER)
+
+        # Modo streaming: mesmos eventos SSE do StreamChatMessageView, para
+        # clientes que já usam este endpoint e querem o primeiro token cedo.
+        # Iterador assíncrono: sob ASGI um generator síncrono seria consumido
+        # inteiro (sync_to_async(list)) antes do primeiro byte
+        if str(request.data.get('stream', 'false')).lower() == 'true':
+            response = StreamingHttpResponse(
+                process_message_stream_async(request.user.id, chat.id, user_message.content),
+                content_type='text/event-stream'
             )
+            response['Cache-Control'] = 'no-cache'
+            response['X-Accel-Buffering'] = 'no'
+            return response
+
+        # Modo assíncrono: responde 202 na hora e gera a resposta da IA numa
+        # thread; o cliente acompanha pela listagem de mensagens
+        if str(request.data.get('async', 'false')).lower() == 'true':
+            # Após o commit: a thread usa outra conexão e precisa ver a mensagem
+            transaction.on_commit(
+                lambda: threading.Thread(
+                    target=self._reply_in_background,
+                    args=(chat, user_message, reply_with_audio),
+                    daemon=True
+                ).start()
+            )
+            return Response({
+                'user_message': self.get_serializer(user_message).data,
+                'status': 'pending'
+            }, status=status.HTTP_202_ACCEPTED)
 
-        reply_with_audio = request.data.get('reply_with_audio', False)
+        ai_messages, cache_status = self._reply(chat, user_message, reply_with_audio)
 
-        # Salvar mensagem do usuário
-        user_message = serializer.save(chat=chat, role=ChatMessage.Role.USER)
-        chat.last_message_at = timezone.now()
-        chat.save()
+        all_new_messages = [user_message] + ai_messages
+        response_serializer = self.get_serializer(all_new_messages, many=True)
+        response = Response(response_serializer.data, status=status.HTTP_201_CREATED)
+        response['X-Cache'] = cache_status
+        return response
 
-        # Obter resposta da IA
-        ai_response_data = get_ai_response(
-            chat_id,
-            user_message.content,
-            user_message_obj=user_message,
-            reply_with_audio=reply_with_audio
+    def _reply(self, chat, user_message, reply_with_audio):
+        """
+        Obtém a resposta da IA (ou do cache semântico) e persiste as mensagens
+        do assistente. Retorna (ai_messages, cache_status).
+        """
+        # Cache semântico: só para bots que permitem, em mensagens de texto puro
+        # sem resposta em áudio
+        use_cache = (
+            not user_message.attachment and not reply_with_audio
+            and response_cache.is_cacheable(user_message.content)
+            and chat.bot.cacheable
         )
+        ai_response_data = None
+        if use_cache:
+            # Ponto da conversa antes desta resposta; o store usa o mesmo
+            marker = response_cache.context_marker(chat.id, before_id=user_message.id)
+            ai_response_data = response_cache.lookup(
+                chat.user_id, chat.bot_id, chat.id, marker, user_message.content
+            )
+        cache_status = 'HIT' if ai_response_data else 'MISS'
+
+        # Obter resposta da IA
+        if ai_response_data is None:
+            ai_response_data = get_ai_response(
+                chat.id,
+                user_message.content,
+                user_message_obj=user_message,
+                reply_with_audio=reply_with_audio
+            )
+            if use_cache:
+                response_cache.store_in_background(
+                    chat.user_id, chat.bot_id, chat.id, marker, user_message.content, ai_response_data
+                )
 
         ai_content = ai_response_data.get('content')
         ai_suggestions = ai_response_data.get('suggestions', [])
@@ -179,77 +331,65 @@ class ChatMessageListView(generics.ListCreateAPIView):
         generated_image_path = ai_response_data.get('generated_image_path')
 
         ai_messages = []
+        suggestion1, suggestion2 = _suggestion_pair(ai_suggestions)
 
-        # Fluxo de imagem gerada
-        if generated_image_path:
-            ai_message = ChatMessage(
-                chat=chat,
-                role=ChatMessage.Role.ASSISTANT,
-                content=ai_content,
-                suggestion1=ai_suggestions[0] if len(ai_suggestions) > 0 else None,
-                suggestion2=ai_suggestions[1] if len(ai_suggestions) > 1 else None,
-            )
-            ai_message.attachment.name = generated_image_path
-            ai_message.attachment_type = 'image'
-            ai_message.original_filename = "generated_image.png"
-            ai_message.save()
-            ai_messages.append(ai_message)
-            chat.last_message_at = timezone.now()
-            chat.save()
-
-        # Fluxo de áudio TTS
-        elif audio_path and os.path.exists(audio_path):
-            ai_message = ChatMessage(
-                chat=chat,
-                role=ChatMessage.Role.ASSISTANT,
-                content=ai_content,
-                suggestion1=ai_suggestions[0] if len(ai_suggestions) > 0 else None,
-                suggestion2=ai_suggestions[1] if len(ai_suggestions) > 1 else None,
-                duration=duration_ms
-            )
-            try:
-                with open(audio_path, 'rb') as f:
-                    filename = f"reply_tts_{uuid.uuid4().hex[:10]}.wav"
-                    ai_message.attachment.save(filename, File(f), save=False)
-                ai_message.attachment_type = 'audio'
-                ai_message.original_filename = "voice_reply.wav"
-                os.remove(audio_path)
-            except Exception as e:
-                logger.error(f"Erro ao anexar áudio TTS: {e}")
-            ai_message.save()
-            ai_messages.append(ai_message)
-
-        # Fluxo de texto padrão
-        else:
-            paragraphs = re.split(r'\n{2,}', ai_content.strip()) if ai_content else []
-            if not paragraphs:
-                paragraphs = ["..."]
-
-            total_paragraphs = len(paragraphs)
-            for i, paragraph_content in enumerate(paragraphs):
-                is_last_paragraph = i == (total_paragraphs - 1)
-                suggestions = ai_suggestions if is_last_paragraph else []
+        # Respostas da IA e last_message_at do chat num único commit
+        with transaction.atomic():
+            # Fluxo de imagem gerada
+            if generated_image_path:
                 ai_message = ChatMessage(
                     chat=chat,
                     role=ChatMessage.Role.ASSISTANT,
-                    content=paragraph_content,
-                    suggestion1=suggestions[0] if len(suggestions) > 0 else None,
-                    suggestion2=suggestions[1] if len(suggestions) > 1 else None,
+                    content=ai_content,
+                    suggestion1=suggestion1,
+                    suggestion2=suggestion2,
                 )
+                ai_message.attachment.name = generated_image_path
+                ai_message.attachment_type = 'image'
+                ai_message.original_filename = "generated_image.png"
                 ai_message.save()
                 ai_messages.append(ai_message)
 
-        if ai_messages:
-            chat.last_message_at = ai_messages[-1].created_at
-            chat.save()
+            # Fluxo de áudio TTS
+            # (arquivo ausente faz attach_local_file falhar e cai no log de erro abaixo)
+            elif audio_path:
+                ai_message = ChatMessage(
+                    chat=chat,
+                    role=ChatMessage.Role.ASSISTANT,
+                    content=ai_content,
+                    suggestion1=suggestion1,
+                    suggestion2=suggestion2,
+                    duration=duration_ms
+                )
+                try:
+                    filename = f"reply_tts_{uuid.uuid4().hex[:10]}.wav"
+                    attach_local_file(ai_message.attachment, audio_path, filename)
+                    ai_message.attachment_type = 'audio'
+                    ai_message.original_filename = "voice_reply.wav"
+                except Exception as e:
+                    logger.error(f"Erro ao anexar áudio TTS: {e}")
+                ai_message.save()
+                ai_messages.append(ai_message)
 
-        all_new_messages = [user_message] + ai_messages
-        response_serializer = self.get_serializer(
-            all_new_messages,
-            many=True,
-            context={'request': request}
-        )
-        return Response(response_serializer.data, status=status.HTTP_201_CREATED)
+            # Fluxo de texto padrão
+            else:
+                paragraphs = _split_paragraphs(ai_content)
+                ai_messages.extend(_create_paragraph_messages(chat, paragraphs, ai_suggestions))
+
+            # Uma única escrita no chat ao final do fluxo
+            chat.last_message_at = ai_messages[-1].created_at if ai_messages else timezone.now()
+            chat.save(update_fields=['last_message_at'])
+
+        return ai_messages, cache_status
+
+    def _reply_in_background(self, chat, user_message, reply_with_audio):
+        try:
+            self._reply(chat, user_message, reply_with_audio)
+        except Exception as e:
+            logger.error(f"Erro ao gerar resposta em background no chat {chat.id}: {e}")
+        finally:
+            # Thread fora do ciclo de request: fecha a conexão aberta pelo ORM
+            connection.close()
 
 
 # =============================================================================
@@ -262,7 +402,9 @@ class StreamChatMessageView(View):
     Endpoint SSE para chat com streaming de texto.
     
     Usa Django View básico (não DRF) para evitar problemas de 
-    content negotiation com Server-Sent Events.
+    content negotiation com Server-Sent Events. A view é assíncrona:
+    sob ASGI (daphne, ver config/asgi.py) cada stream não prende um worker.
+    Sob WSGI o Django consumiria o stream inteiro antes de responder.
     
     URL: POST /api/v1/chats/<pk>/stream/
     """
@@ -287,10 +429,10 @@ class StreamChatMessageView(View):
             logger.warning(f"[Stream] JWT auth failed: {e}")
             return None
 
-    def post(self, request, pk):
-        """Processa POST request e retorna SSE stream."""
+    async def post(self, request, pk):
+        """Processa POST request e retorna SSE stream (view assíncrona)."""
         # 1. Autenticação manual
-        user = self._authenticate(request)
+        user = await sync_to_async(self._authenticate)(request)
         if not user:
             return JsonResponse(
                 {"detail": "Authentication credentials were not provided."},
@@ -299,7 +441,7 @@ class StreamChatMessageView(View):
 
         # 2. Verificar se o chat pertence ao usuário
         try:
-            chat = Chat.objects.get(id=pk, user=user)
+            chat = await Chat.objects.aget(id=pk, user=user)
         except Chat.DoesNotExist:
             return JsonResponse({"detail": "Chat not found."}, status=404)
 
@@ -311,26 +453,26 @@ class StreamChatMessageView(View):
 
         # 3. Parsear body JSON
         try:
-            body = json.loads(request.body.decode('utf-8'))
-            content = body.get('content', '').strip()
-        except (json.JSONDecodeError, UnicodeDecodeError):
+            body = orjson.loads(request.body)
+            content = (body.get('content') or '').strip()
+        except (orjson.JSONDecodeError, AttributeError):
             return JsonResponse({"detail": "Invalid JSON body."}, status=400)
 
         if not content:
             return JsonResponse({"detail": "Content is required."}, status=400)
 
-        # 4. Salvar mensagem do usuário
-        ChatMessage.objects.create(
+        # 4. Salvar mensagem do usuário. last_message_at sobe já aqui: se a
+        # geração falhar, o chat ainda aparece no topo da lista
+        user_message = await ChatMessage.objects.acreate(
             chat=chat,
             role=ChatMessage.Role.USER,
             content=content
         )
-        chat.last_message_at = timezone.now()
-        chat.save()
+        await Chat.objects.filter(pk=chat.pk).aupdate(last_message_at=user_message.created_at)
 
-        # 5. Criar e retornar StreamingHttpResponse
+        # 5. Criar e retornar StreamingHttpResponse (iterador assíncrono de bytes)
         response = StreamingHttpResponse(
-            process_message_stream(user.id, chat.id, content),
+            process_message_stream_async(user.id, chat.id, content),
             content_type='text/event-stream'
         )
         
@@ -345,18 +487,34 @@ class StreamChatMessageView(View):
 # VIEWS DE ANEXOS E UPLOAD
 # =============================================================================
 
-class ChatMessageAttachmentView(generics.CreateAPIView):
+def _upload_mime(uploaded_file):
     """
-    Upload de anexos com processamento RAG síncrono.
+    MIME do upload pelo Content-Type enviado pelo cliente; a extensão só é
+    consultada quando ele falta ou é genérico (application/octet-stream).
+    """
+    mime = uploaded_file.content_type
+    if not mime or mime == 'application/octet-stream':
+        mime = mimetypes.guess_type(uploaded_file.name)[0]
+    return mime or ''
+
+
+class ChatMessageAttachmentView(ChatLookupMixin, generics.CreateAPIView):
+    """
+    Upload de anexos com processamento RAG em background.
     Suporta PDFs, DOCX e TXT para indexação vetorial.
     """
     serializer_class = ChatMessageAttachmentSerializer
     permission_classes = [permissions.IsAuthenticated]
     parser_classes = [parsers.MultiPartParser, parsers.FormParser]
 
+    def dispatch(self, request, *args, **kwargs):
+        # Só esta view descarta uploads grandes no meio da transferência (e
+        # responde 413 em create); as outras seguem com os handlers padrão
+        request.upload_handlers = [MaxSizeTemporaryFileUploadHandler(request)]
+        return super().dispatch(request, *args, **kwargs)
+
     def create(self, request, *args, **kwargs):
-        chat_id = self.kwargs['chat_pk']
-        chat = get_object_or_404(Chat, id=chat_id, user=self.request.user)
+        chat = self.get_chat()
 
         if chat.status != Chat.ChatStatus.ACTIVE:
             return Response({"detail": "Archived."}, status=403)
@@ -365,51 +523,57 @@ class ChatMessageAttachmentView(generics.CreateAPIView):
             [request.FILES.get('attachment')] if request.FILES.get('attachment') else []
         )
 
+        # Arquivos descartados no meio do upload pelo MaxSizeTemporaryFileUploadHandler
+        # (só existe depois que request.FILES dispara o parsing acima)
+        oversized = getattr(request, 'oversized_uploads', None)
+        if oversized:
+            return Response(
+                {"detail": f"File size cannot exceed {settings.FILE_UPLOAD_MAX_SIZE // (1024 * 1024)}MB.",
+                 "files": oversized},
+                status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+            )
+
         if not files:
             return Response({"detail": "No files."}, status=400)
 
         created_msgs = []
+        rag_attachments = []
+        serializer_class = self.get_serializer_class()
+        serializer_context = self.get_serializer_context()
         try:
             with transaction.atomic():
                 for f in files:
-                    mime, _ = mimetypes.guess_type(f.name)
+                    mime = _upload_mime(f)
+                    attachment_type = 'image' if mime and mime.startswith('image/') else 'file'
+                    is_processable = attachment_type == 'file' and mime in PROCESSABLE_MIMES
 
                     # Salvar arquivo
-                    m = self.get_serializer(data={'attachment': f, 'content': ''})
+                    m = serializer_class(data={'attachment': f, 'content': ''}, context=serializer_context)
                     m.is_valid(raise_exception=True)
                     obj = m.save(
                         chat=chat,
                         role=ChatMessage.Role.USER,
-                        attachment_type='image' if mime and mime.startswith('image/') else 'file',
-                        original_filename=f.name
+                        attachment_type=attachment_type,
+                        original_filename=f.name,
+                        rag_status='pending' if is_processable else None
                     )
                     created_msgs.append(obj)
 
-                    # Processamento RAG para documentos
-                    processable_mimes = [
-                        'application/pdf',
-                        'application/vnd.openxmlformats-officedocument.wordprocessingml.document',
-                        'text/plain'
-                    ]
-                    if obj.attachment_type == 'file' and mime in processable_mimes:
-                        try:
-                            logger.info(f"[RAG] Processando: {obj.original_filename}")
-                            text = FileProcessor.extract_text(obj.attachment.path, mime)
-                            if text:
-                                chunks = FileProcessor.chunk_text(text)
-                                if chunks:
-                                    vector_service.add_document_chunks(
-                                        user_id=chat.user.id,
-                                        bot_id=chat.bot.id,
-                                        chunks=chunks,
-                                        source_name=obj.original_filename
-                                    )
-                        except Exception as rag_error:
-                            logger.error(f"[RAG ERROR] {obj.original_filename}: {rag_error}")
-
-            if created_msgs:
-                chat.last_message_at = created_msgs[-1].created_at
-                chat.save()
+                    if is_processable:
+                        rag_attachments.append((obj.id, mime))
+
+                # Indexação RAG de todos os arquivos num único job, após o commit
+                if rag_attachments:
+                    transaction.on_commit(
+                        lambda: threading.Thread(
+                            target=process_attachments_rag_background,
+                            args=(rag_attachments,)
+                        ).start()
+                    )
+
+                if created_msgs:
+                    chat.last_message_at = created_msgs[-1].created_at
+                    chat.save(update_fields=['last_message_at'])
 
             return Response(
                 ChatMessageSerializer(created_msgs, many=True, context={'request': request}).data,
@@ -424,13 +588,13 @@ class ChatMessageAttachmentView(generics.CreateAPIView):
 # VIEWS DE ÁUDIO E TRANSCRIÇÃO
 # =============================================================================
 
-class AudioTranscriptionView(APIView):
+class AudioTranscriptionView(ChatLookupMixin, APIView):
     """Transcreve áudio usando Gemini."""
     permission_classes = [permissions.IsAuthenticated]
     parser_classes = [parsers.MultiPartParser, parsers.FormParser]
 
     def post(self, request, chat_pk):
-        get_object_or_404(Chat, id=chat_pk, user=request.user)
+        self.get_chat(chat_pk)
         f = request.FILES.get('audio')
         if not f:
             return Response({"detail": "No audio."}, status=400)
@@ -441,13 +605,13 @@ class AudioTranscriptionView(APIView):
         return Response({"detail": res['error']}, status=500)
 
 
-class VoiceInteractionView(APIView):
+class VoiceInteractionView(ChatLookupMixin, APIView):
     """Interação por voz sem resposta em áudio."""
     permission_classes = [permissions.IsAuthenticated]
     parser_classes = [parsers.MultiPartParser, parsers.FormParser]
 
     def post(self, request, chat_pk):
-        chat = get_object_or_404(Chat, id=chat_pk, user=request.user)
+        chat = self.get_chat(chat_pk)
         f = request.FILES.get('audio')
         if not f:
             return Response({"detail": "No audio."}, status=400)
@@ -464,13 +628,13 @@ class VoiceInteractionView(APIView):
             return Response({"detail": str(e)}, status=500)
 
 
-class VoiceMessageView(APIView):
+class VoiceMessageView(ChatLookupMixin, APIView):
     """Processa mensagem de voz com resposta opcional em áudio."""
     permission_classes = [permissions.IsAuthenticated]
     parser_classes = [parsers.MultiPartParser, parsers.FormParser]
 
     def post(self, request, chat_pk):
-        chat = get_object_or_404(Chat, id=chat_pk, user=request.user)
+        chat = self.get_chat(chat_pk)
         f = request.FILES.get('audio') or request.FILES.get('file') or request.FILES.get('attachment')
         if not f:
             return Response({"detail": "No audio."}, status=400)
@@ -486,7 +650,7 @@ class VoiceMessageView(APIView):
             res = handle_voice_message(chat.id, f, reply_audio, request.user)
             if user_duration > 0:
                 res['user_message'].duration = user_duration
-                res['user_message'].save()
+                res['user_message'].save(update_fields=['duration'])
 
             return Response([
                 ChatMessageSerializer(res['user_message'], context={'request': request}).data,
@@ -500,40 +664,72 @@ class VoiceMessageView(APIView):
 # VIEWS DE GERENCIAMENTO DE CHAT
 # =============================================================================
 
-class ArchiveChatView(APIView):
+class ArchiveChatView(ChatLookupMixin, APIView):
     """Arquiva chat atual e cria um novo."""
     permission_classes = [permissions.IsAuthenticated]
+    # Só bot_id é usado: dispensa o JOIN com bot
+    chat_select_related = ()
 
     def post(self, request, chat_id):
-        c = get_object_or_404(Chat, id=chat_id, user=request.user)
-        c.status = Chat.ChatStatus.ARCHIVED
-        c.save()
+        c = self.get_chat(chat_id)
+        with transaction.atomic():
+            # UPDATE condicional: não escreve nada se o chat já estava arquivado
+            Chat.objects.filter(
+                pk=c.pk,
+                status=Chat.ChatStatus.ACTIVE
+            ).update(status=Chat.ChatStatus.ARCHIVED)
 
-        n = Chat.objects.create(
-            user=request.user,
-            bot=c.bot,
-            status=Chat.ChatStatus.ACTIVE
-        )
+            # Pela constraint one_active_chat_per_user_bot, se outro request já
+            # criou o chat ativo (ou este chat já estava arquivado), reaproveita
+            n, _ = Chat.objects.get_or_create(
+                user=request.user,
+                bot_id=c.bot_id,
+                status=Chat.ChatStatus.ACTIVE
+            )
+        bootstrap_cache.invalidate_user_bot(request.user.id, c.bot_id)
         return Response({"new_chat_id": n.id}, status=201)
 
 
-class SetActiveChatView(APIView):
+class SetActiveChatView(ChatLookupMixin, APIView):
     """Define um chat arquivado como ativo."""
     permission_classes = [permissions.IsAuthenticated]
+    # ChatListSerializer lê bot.owner.username
+    chat_select_related = ('bot', 'bot__owner')
 
     def post(self, request, chat_id):
-        c = get_object_or_404(Chat, id=chat_id, user=request.user)
-
-        # Arquivar outros chats ativos do mesmo bot
-        Chat.objects.filter(
-            user=request.user,
-            bot=c.bot,
-            status=Chat.ChatStatus.ACTIVE
-        ).update(status=Chat.ChatStatus.ARCHIVED)
+        c = self.get_chat(chat_id)
+        now = timezone.now()
+
+        # Troca de chat ativo atômica: nunca há dois chats ativos visíveis.
+        # Os chats do usuário com o bot ficam travados até o commit, então dois
+        # requests simultâneos se serializam em vez de violar a constraint
+        # one_active_chat_per_user_bot; se ainda assim ela disparar
+        # (ex: bootstrap criou um chat ativo no meio), responde 409
+        try:
+            with transaction.atomic():
+                list(
+                    Chat.objects.select_for_update()
+                    .filter(user=request.user, bot_id=c.bot_id)
+                    .values_list('pk', flat=True)
+                )
+                Chat.objects.filter(
+                    user=request.user,
+                    bot_id=c.bot_id,
+                    status=Chat.ChatStatus.ACTIVE
+                ).exclude(pk=c.pk).update(status=Chat.ChatStatus.ARCHIVED)
+                Chat.objects.filter(pk=c.pk).update(status=Chat.ChatStatus.ACTIVE, last_message_at=now)
+        except IntegrityError:
+            return Response(
+                {"detail": "Another chat was activated concurrently. Try again."},
+                status=status.HTTP_409_CONFLICT
+            )
 
         c.status = Chat.ChatStatus.ACTIVE
-        c.last_message_at = timezone.now()
-        c.save()
+        c.last_message_at = now
+        bootstrap_cache.invalidate_user_bot(request.user.id, c.bot_id)
+
+        # Mesmos prefetches da listagem: categorias do bot e última mensagem
+        prefetch_related_objects([c], *CHAT_LIST_PREFETCHES)
 
         return Response(
             ChatListSerializer(c, context={'request': request}).data,
@@ -561,12 +757,12 @@ class MessageFeedbackView(APIView):
             return Response({'detail': 'Invalid feedback value. Use "like", "dislike" or null.'}, status=400)
             
         m.feedback = feedback
-        m.save()
+        m.save(update_fields=['feedback'])
         
         return Response({'feedback': m.feedback}, status=200)
 
 
-class RegenerateMessageView(APIView):
+class RegenerateMessageView(ChatLookupMixin, APIView):
     """
     Regera a última resposta do assistente.
     Apaga as mensagens do assistente que seguiram a última mensagem do usuário
@@ -575,7 +771,7 @@ class RegenerateMessageView(APIView):
     permission_classes = [permissions.IsAuthenticated]
 
     def post(self, request, chat_pk):
-        chat = get_object_or_404(Chat, id=chat_pk, user=request.user)
+        chat = self.get_chat(chat_pk)
         
         # Encontra a última mensagem do usuário
         last_user_msg = chat.messages.filter(role=ChatMessage.Role.USER).order_by('-created_at').first()
@@ -583,9 +779,20 @@ class RegenerateMessageView(APIView):
         if not last_user_msg:
              return Response({"detail": "No user message to reply to."}, status=400)
              
+        # A resposta rejeitada não pode voltar do cache na próxima vez que a pergunta for feita
+        if chat.bot.cacheable:
+            response_cache.evict(
+                chat.user_id, chat.bot_id, chat.id,
+                response_cache.context_marker(chat.id, before_id=last_user_msg.id),
+                last_user_msg.content
+            )
+
         # Apaga todas as mensagens que vieram DEPOIS dessa mensagem do usuário (normalmente a resposta antiga)
         # Isso garante que limpamos a resposta anterior antes de gerar a nova.
-        chat.messages.filter(created_at__gt=last_user_msg.created_at).delete()
+        # DELETE direto, sem o SELECT do Collector: ChatMessage não tem signals de
+        # delete nem FKs apontando para ela. Revisar se isso mudar.
+        stale_messages = ChatMessage.objects.filter(chat=chat, created_at__gt=last_user_msg.created_at)
+        stale_messages._raw_delete(stale_messages.db)
         
         # Gera nova resposta (reusando a lógica de get_ai_response)
         # Nota: reply_with_audio defaults to False here for simplicity, or we could pass it from request
@@ -606,28 +813,12 @@ class RegenerateMessageView(APIView):
         ai_suggestions = ai_response_data.get('suggestions', [])
         # Ignore audio generation for regenerate for now unless strictly needed
         
-        paragraphs = re.split(r'\\n{2,}', ai_content.strip()) if ai_content else []
-        if not paragraphs:
-            paragraphs = ["..."]
-
-        ai_messages = []
-        total_paragraphs = len(paragraphs)
-        for i, paragraph_content in enumerate(paragraphs):
-            is_last_paragraph = i == (total_paragraphs - 1)
-            suggestions = ai_suggestions if is_last_paragraph else []
-            ai_message = ChatMessage(
-                chat=chat,
-                role=ChatMessage.Role.ASSISTANT,
-                content=paragraph_content,
-                suggestion1=suggestions[0] if len(suggestions) > 0 else None,
-                suggestion2=suggestions[1] if len(suggestions) > 1 else None,
-            )
-            ai_message.save()
-            ai_messages.append(ai_message)
+        paragraphs = _split_paragraphs(ai_content)
+        ai_messages = _create_paragraph_messages(chat, paragraphs, ai_suggestions)
 
         if ai_messages:
             chat.last_message_at = ai_messages[-1].created_at
-            chat.save()
+            chat.save(update_fields=['last_message_at'])
             
         response_serializer = ChatMessageSerializer(
             ai_messages,
@@ -645,6 +836,9 @@ class RegenerateMessageView(APIView):
 class CleanupFileResponse(FileResponse):
     """FileResponse que remove o arquivo após envio."""
 
+    # Blocos de 64KB em vez dos 4KB padrão: menos iterações por arquivo
+    block_size = 64 * 1024
+
     def __init__(self, *args, cleanup_path=None, **kwargs):
         super().__init__(*args, **kwargs)
         self.cleanup_path = cleanup_path
@@ -682,6 +876,7 @@ class MessageTTSView(APIView):
             return CleanupFileResponse(
                 open(p, 'rb'),
                 content_type='audio/wav',
+                filename=p.name,
                 cleanup_path=str(p)
             )
         return Response({"detail": "Error"}, status=500)
@@ -690,7 +885,7 @@ class MessageTTSView(APIView):
 # VIEWS DE CONTEXTO E FONTES (NOVO)
 # =============================================================================
 
-class ChatSourceView(APIView):
+class ChatSourceView(ChatLookupMixin, APIView):
     """
     Manage sources specific to a chat.
     POST: Upload/Link a source.
@@ -700,7 +895,7 @@ class ChatSourceView(APIView):
     parser_classes = [parsers.MultiPartParser, parsers.FormParser]
 
     def post(self, request, chat_id):
-        chat = get_object_or_404(Chat, id=chat_id, user=request.user)
+        chat = self.get_chat(chat_id)
         
         # 1. Create KnowledgeSource
         title = request.data.get('title', 'Chat Upload')
@@ -717,55 +912,48 @@ class ChatSourceView(APIView):
         elif source_type in ['URL', 'YOUTUBE']:
             source.url = request.data.get('url')
             
+        source.rag_status = 'pending'
         source.save()
-        
-        # 2. Extract Text (Sync for now, or reuse logic)
-        try:
-            extracted_text = ""
-            if source.source_type == 'FILE' and source.file:
-                extracted_text = FileProcessor.extract_text(source.file.path)
-            elif source.url:
-                # Assuming ContentExtractor is available or similar logic
-                from chat.services.content_extractor import ContentExtractor
-                extracted_text = ContentExtractor.extract_from_url(source.url)
-            
-            if extracted_text:
-                source.extracted_text = extracted_text
-                source.save()
-                
-                # 3. Index in Vector DB
-                chunks = FileProcessor.chunk_text(extracted_text)
-                if chunks:
-                    vector_service.add_document_chunks(
-                        user_id=request.user.id,
-                        bot_id=chat.bot.id,
-                        chunks=chunks,
-                        source_name=source.title
-                    )
-        except Exception as e:
-            logger.error(f"Error processing chat source: {e}")
 
-        # 4. Link to Chat
+        # 2. Link to Chat
         chat.sources.add(source)
+
+        # 3. Extração + indexação em background, após o commit
+        transaction.on_commit(
+            lambda: threading.Thread(
+                target=process_chat_source_background,
+                args=(source.id, request.user.id, chat.bot_id)
+            ).start()
+        )
         
         return Response({
             'id': source.id,
             'title': source.title,
             'source_type': source.source_type,
+            'rag_status': source.rag_status,
             'created_at': source.created_at
         }, status=status.HTTP_201_CREATED)
 
     def delete(self, request, chat_id, source_id):
-        chat = get_object_or_404(Chat, id=chat_id, user=request.user)
-        source = get_object_or_404(KnowledgeSource, id=source_id, user=request.user)
-        
-        if source in chat.sources.all():
-            chat.sources.remove(source)
+        chat = self.get_chat(chat_id)
+
+        # Remove o vínculo direto na tabela intermediária: um único DELETE,
+        # sem carregar as fontes do chat (não há receivers de m2m_changed)
+        deleted, _ = Chat.sources.through.objects.filter(
+            chat_id=chat.id,
+            knowledgesource_id=source_id,
+            knowledgesource__user=request.user
+        ).delete()
+        if deleted:
             return Response(status=status.HTTP_204_NO_CONTENT)
         return Response(status=status.HTTP_404_NOT_FOUND)
 
 
-class ContextSourcesView(APIView):
+# Campos de KnowledgeSource lidos pelo ContextSourcesView
+CONTEXT_SOURCE_FIELDS = ('id', 'title', 'source_type', 'url', 'file', 'created_at', 'rag_status')
+
+
+class ContextSourcesView(ChatLookupMixin, APIView):
     """
     Retorna a lista de fontes disponíveis para um chat (documentos indexados).
     Inclui fontes da KB do bot e fontes específicas do chat.
@@ -773,62 +961,42 @@ class ContextSourcesView(APIView):
     permission_classes = [permissions.IsAuthenticated]
 
     def get(self, request, chat_id):
-        chat = get_object_or_404(Chat, id=chat_id, user=request.user)
-        
-        sources_list = []
-        seen_ids = set()
-
-        # Helper para formatar
-        def add_source(s, origin_type, prefix):
-            # Use prefixed ID to prevent collision between ChatMessage (source) and KnowledgeSource
-            # Actually Chat.sources links to KnowledgeSource model now?
-            # Wait. Chat.sources is ManyToMany to KnowledgeSource.
-            # StudySpace.sources is ManyToMany to KnowledgeSource.
-            # THEY ARE THE SAME MODEL.
-            # KnowledgeSource IDs are unique across the table.
-            # So collisions are NOT possible between a chat source and a space source because they are the same entity type.
-            # BUT, SourceAssemblyService currently looks at ChatMessage.
-            # Does Chat.sources link to ChatMessage or KnowledgeSource?
-            # backend/chat/models.py: sources = models.ManyToManyField('studio.KnowledgeSource', ...)
-            # So they ARE KnowledgeSource.
-            
-            # HOWEVER, SourceAssemblyService (read in previous step) looks at ChatMessage.objects.filter(id__in=source_ids).
-            # This is WRONG if the sources are KnowledgeSource objects.
-            # Previously, "sources" were file attachments on messages.
-            # Now, we have a distinct KnowledgeSource model.
-            # The SourceAssemblyService must be updated to look at KnowledgeSource model, NOT ChatMessage (or both if we support legacy).
-            
-            # Legacy support: Messages with attachments.
-            # New support: KnowledgeSource objects.
-            
-            # Let's verify what `ContextSourcesView` returns. 
-            # It iterates `chat.sources.all()` -> These are KnowledgeSource.
-            # It iterates `space.sources.all()` -> These are KnowledgeSource.
-            # So the IDs are consistent (KnowledgeSource IDs).
-            
-            # The PROBLEM is SourceAssemblyService is querying ChatMessage with these IDs.
-            # I need to update SourceAssemblyService to query KnowledgeSource.
-            
-            if s.id in seen_ids: return
-            seen_ids.add(s.id)
-            sources_list.append({
-                'id': s.id,
-                'title': s.title,
-                'type': origin_type, # 'chat_source' ou 'space_source'
-                'source_type': s.source_type,
-                'url': s.url or (s.file.url if s.file else None),
-                'created_at': s.created_at,
+        chat = self.get_chat(chat_id)
+
+        # Chat.sources e StudySpace.sources apontam para o mesmo KnowledgeSource:
+        # uma única query, sem JOINs que dupliquem linhas. Fontes ligadas ao
+        # chat têm prioridade sobre as dos espaços de estudo do bot.
+        in_chat = Exists(Chat.sources.through.objects.filter(
+            chat_id=chat.id, knowledgesource_id=OuterRef('pk')
+        ))
+        space_source_ids = StudySpace.sources.through.objects.filter(
+            studyspace__bots=chat.bot_id
+        ).values('knowledgesource_id')
+        rows = KnowledgeSource.objects.annotate(
+            in_chat=in_chat
+        ).filter(
+            Q(in_chat=True) | Q(pk__in=space_source_ids)
+        ).annotate(
+            origin=Case(
+                When(in_chat=True, then=Value('chat_source')),
+                default=Value('space_source'),
+                output_field=CharField()
+            )
+        ).order_by('origin', 'id').values(*CONTEXT_SOURCE_FIELDS, 'origin')
+
+        file_storage = KnowledgeSource._meta.get_field('file').storage
+        sources_list = [
+            {
+                'id': row['id'],
+                'title': row['title'],
+                'type': row['origin'],  # 'chat_source' ou 'space_source'
+                'source_type': row['source_type'],
+                'url': row['url'] or (file_storage.url(row['file']) if row['file'] else None),
+                'created_at': row['created_at'],
+                'rag_status': row['rag_status'],
                 'selected': True
-            })
-
-        # 1. Fontes Específicas do Chat
-        for s in chat.sources.all():
-            add_source(s, 'chat_source', '')
+            }
+            for row in rows
+        ]
 
-        # 2. Fontes dos Espaços de Estudo vinculados ao Bot
-        if chat.bot:
-            for space in chat.bot.study_spaces.all():
-                for s in space.sources.all():
-                    add_source(s, 'space_source', '')
-            
         return Response(sources_list, status=200)
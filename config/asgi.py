@@ -3,6 +3,11 @@ ASGI config for config project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+This is the entry point to deploy with: the chat SSE endpoint is an async view
+over an async iterator, and a WSGI server would buffer the whole stream before
+sending it. Run it with ``daphne config.asgi:application`` (``daphne`` is in
+INSTALLED_APPS, so ``manage.py runserver`` serves it over ASGI as well).
+
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
 """
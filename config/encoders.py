@@ -0,0 +1,14 @@
+# config/encoders.py
+import orjson
+from django.core.serializers.json import DjangoJSONEncoder
+
+
+class ORJSONEncoder(DjangoJSONEncoder):
+    """
+    JSONField encoder backed by orjson.
+    Types orjson does not know (Decimal, lazy strings, UUID subclasses...) fall
+    back to DjangoJSONEncoder.default; non-string keys are stringified like json.dumps.
+    """
+
+    def encode(self, o):
+        return orjson.dumps(o, default=self.default, option=orjson.OPT_NON_STR_KEYS).decode()
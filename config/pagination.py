@@ -1,5 +1,5 @@
 # config/pagination.py
-from rest_framework.pagination import PageNumberPagination
+from rest_framework.pagination import CursorPagination, PageNumberPagination
 
 class StandardMessagePagination(PageNumberPagination):
     """
@@ -8,4 +8,26 @@ class StandardMessagePagination(PageNumberPagination):
     """
     page_size = 30
     page_size_query_param = 'page_size'
-    max_page_size = 100
\ No newline at end of file
+    max_page_size = 100
+
+class StandardMessageCursorPagination(CursorPagination):
+    """
+    Cursor pagination for chat messages, newest first.
+    Each page is a range scan on (chat, -created_at), so deep pages in long
+    chats cost the same as the first one. Ties on created_at (paragraphs of
+    one reply) are ordered by id.
+    """
+    ordering = ('-created_at', '-id')
+    page_size = 30
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+
+class ExplorePagination(PageNumberPagination):
+    """
+    Pagination for the explore bot list.
+    The search fires on every keystroke, so pages are kept small.
+    """
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 50
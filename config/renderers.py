@@ -0,0 +1,28 @@
+# config/renderers.py
+import orjson
+from rest_framework.renderers import BaseRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+
+class ORJSONRenderer(BaseRenderer):
+    """
+    JSON renderer backed by orjson.
+    Types orjson does not know (lazy strings, Decimal, QuerySet...) fall back
+    to DRF's own encoder. Datetimes are passed through to it as well: orjson
+    would emit microseconds and "+00:00" where DRF emits milliseconds and "Z".
+    """
+    media_type = 'application/json'
+    format = 'json'
+    charset = None
+
+    _fallback = JSONEncoder().default
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        # Non-str keys: DRF indexes ListField/ListSerializer errors by position ({0: [...]})
+        return orjson.dumps(
+            data,
+            default=self._fallback,
+            option=orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+        )
@@ -45,6 +45,8 @@ ALLOWED_HOSTS = ["*"]  # Change in production
 
 # Application definition
 INSTALLED_APPS = [
+    # Primeiro da lista: faz o runserver servir via ASGI (necessário para o SSE assíncrono)
+    "daphne",
     "django.contrib.admin",
     "django.contrib.auth",
     "django.contrib.contenttypes",
@@ -91,6 +93,9 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = "config.wsgi.application"
+# O stream SSE (StreamChatMessageView) é assíncrono: sob WSGI o Django consome
+# o iterador inteiro antes de responder. Em produção: daphne config.asgi:application
+ASGI_APPLICATION = "config.asgi.application"
 
 # Database
 DATABASES = {
@@ -139,6 +144,10 @@ REST_FRAMEWORK = {
     "DEFAULT_PERMISSION_CLASSES": (
         "rest_framework.permissions.IsAuthenticatedOrReadOnly",
     ),
+    "DEFAULT_RENDERER_CLASSES": (
+        "config.renderers.ORJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ),
 }
 
 # Simple JWT settings
@@ -183,3 +192,47 @@ USE_VERTEX_AI = False
 # Configurações Vertex AI (preencha quando for migrar)
 VERTEX_PROJECT_ID = os.getenv('VERTEX_PROJECT_ID', '')
 VERTEX_LOCATION = os.getenv('VERTEX_LOCATION', 'us-central1')
+
+# --- Cache (Redis se REDIS_URL estiver definido, memória local caso contrário) ---
+REDIS_URL = os.getenv('REDIS_URL')
+if REDIS_URL:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        }
+    }
+
+# --- Cache semântico de respostas da IA ---
+# Similaridade cosseno mínima para reutilizar uma resposta e validade em segundos.
+SEMANTIC_CACHE_THRESHOLD = float(os.getenv('SEMANTIC_CACHE_THRESHOLD', '0.95'))
+SEMANTIC_CACHE_TTL = int(os.getenv('SEMANTIC_CACHE_TTL', str(60 * 60 * 24)))
+
+# --- Cache do payload de bootstrap do chat (segundos) ---
+BOOTSTRAP_CACHE_TTL = int(os.getenv('BOOTSTRAP_CACHE_TTL', '300'))
+
+# --- URLs de mídia ---
+# Origem pública (ex: https://api.exemplo.com) usada para montar URLs absolutas;
+# vazio usa o esquema/host de cada request.
+SITE_URL = os.getenv('SITE_URL', '').rstrip('/')
+
+# --- Uploads ---
+# Limite dos anexos do chat: o upload vai direto para disco em chunks e é
+# descartado ao passar do limite (handler instalado só em ChatMessageAttachmentView).
+FILE_UPLOAD_MAX_SIZE = int(os.getenv('FILE_UPLOAD_MAX_SIZE', str(50 * 1024 * 1024)))
+
+# --- Estúdio ---
+# Máximo de gerações de artefatos chamando o Gemini ao mesmo tempo (por processo).
+STUDIO_MAX_CONCURRENT_GENERATIONS = int(os.getenv('STUDIO_MAX_CONCURRENT_GENERATIONS', '4'))
+# Validade (segundos) do contexto montado a partir das fontes de um chat.
+STUDIO_CONTEXT_CACHE_TTL = int(os.getenv('STUDIO_CONTEXT_CACHE_TTL', str(60 * 15)))
+
+# --- Streaming SSE do chat ---
+# Pausa (segundos) entre chunks enviados ao cliente; 0 envia assim que chegam.
+STREAM_CHUNK_DELAY = float(os.getenv('STREAM_CHUNK_DELAY', '0.03'))
@@ -0,0 +1,22 @@
+# config/upload_handlers.py
+from django.conf import settings
+from django.core.files.uploadhandler import SkipFile, TemporaryFileUploadHandler
+
+
+class MaxSizeTemporaryFileUploadHandler(TemporaryFileUploadHandler):
+    """
+    Streams every upload to a temporary file (never held in RAM) and drops a
+    file as soon as it grows past FILE_UPLOAD_MAX_SIZE, instead of letting it
+    finish writing before the serializer rejects it.
+    Dropped file names are recorded in request.oversized_uploads, so a view
+    installing this handler must check it and reject the request.
+    """
+
+    def receive_data_chunk(self, raw_data, start):
+        if start + len(raw_data) > settings.FILE_UPLOAD_MAX_SIZE:
+            self.file.close()
+            if not hasattr(self.request, 'oversized_uploads'):
+                self.request.oversized_uploads = []
+            self.request.oversized_uploads.append(self.file_name)
+            raise SkipFile()
+        return super().receive_data_chunk(raw_data, start)
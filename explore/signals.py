@@ -0,0 +1,14 @@
+# explore/signals.py
+from django.core.cache import cache
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from bots.models import Category
+from .views import CATEGORY_CACHE_KEY
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def invalidate_category_cache(sender, instance, **kwargs):
+    """The explore category list is cached for all users: drop it on any change."""
+    cache.delete(CATEGORY_CACHE_KEY)
@@ -1,3 +1,41 @@
-from django.test import TestCase
+from django.contrib.auth import get_user_model
+from rest_framework import status
+from rest_framework.test import APITestCase
 
-# Create your tests here.
+from bots.models import Bot
+
+User = get_user_model()
+
+
+class ExploreBotListPaginationTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='explorer', password='password')
+        self.client.force_authenticate(user=self.user)
+        Bot.objects.bulk_create([
+            Bot(name=f'Bot {i:02d}', prompt='p', owner=self.user) for i in range(25)
+        ])
+        Bot.objects.create(name='Hidden', prompt='p', owner=self.user, publicity=Bot.Publicity.PRIVATE)
+
+    def test_response_is_paginated(self):
+        """
+        Contrato da listagem: objeto paginado com os bots em "results"
+        """
+        response = self.client.get('/api/v1/explore/bots/')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        data = response.json()
+        self.assertEqual(set(data), {'count', 'next', 'previous', 'results'})
+        self.assertEqual(data['count'], 25)
+        self.assertEqual(len(data['results']), 20)
+        self.assertIsNone(data['previous'])
+        self.assertIn('page=2', data['next'])
+        self.assertEqual(data['results'][0]['name'], 'Bot 00')
+
+    def test_last_page_and_page_size(self):
+        response = self.client.get('/api/v1/explore/bots/', {'page': 2})
+        data = response.json()
+        self.assertEqual([b['name'] for b in data['results']], [f'Bot {i}' for i in range(20, 25)])
+        self.assertIsNone(data['next'])
+
+        response = self.client.get('/api/v1/explore/bots/', {'page_size': 5})
+        self.assertEqual(len(response.json()['results']), 5)
@@ -1,4 +1,6 @@
 # explore/views.py
+from django.core.cache import cache
+from django.utils import timezone
 from rest_framework import generics, status
 from rest_framework.response import Response
 from bots.models import Bot, Category
@@ -6,6 +8,12 @@ from bots.serializers import BotSerializer, CategorySerializer
 from .models import SearchHistory
 from .serializers import SearchHistorySerializer
 from rest_framework.permissions import IsAuthenticated
+from config.pagination import ExplorePagination
+
+# Categories rarely change, so the serialized list is shared by every user.
+# It is dropped by the Category signals in explore/signals.py.
+CATEGORY_CACHE_KEY = 'explore:categories'
+CATEGORY_CACHE_TTL = 60 * 5
 
 class ExploreCategoryListView(generics.ListAPIView):
     """View to list all categories for the explore screen."""
@@ -13,14 +21,33 @@ class ExploreCategoryListView(generics.ListAPIView):
     serializer_class = CategorySerializer
     permission_classes = [IsAuthenticated]
 
+    def list(self, request, *args, **kwargs):
+        data = cache.get(CATEGORY_CACHE_KEY)
+        if data is None:
+            data = self.get_serializer(self.get_queryset(), many=True).data
+            cache.set(CATEGORY_CACHE_KEY, data, CATEGORY_CACHE_TTL)
+        return Response(data)
+
 class ExploreBotListView(generics.ListAPIView):
-    """View to list public bots, optionally filtered by category or search term."""
+    """
+    View to list public bots, optionally filtered by category or search term.
+
+    The response is paginated (ExplorePagination), not a bare list:
+    {"count": int, "next": url | null, "previous": url | null, "results": [bot, ...]}.
+    Clients read the bots from "results" and follow "next" (or pass ?page=N)
+    for more; ?page_size= goes up to 50.
+    """
     serializer_class = BotSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = ExplorePagination
 
     def get_queryset(self):
-        # Start with only public bots
-        queryset = Bot.objects.filter(publicity=Bot.Publicity.PUBLIC)
+        # Start with only public bots; owner and categories are loaded up front for the serializer
+        queryset = (
+            Bot.objects.filter(publicity=Bot.Publicity.PUBLIC)
+            .select_related('owner')
+            .prefetch_related('categories')
+        )
         
         # Filter by category
         category_id = self.request.query_params.get('category_id')
@@ -35,7 +62,9 @@ class ExploreBotListView(generics.ListAPIView):
         if search_term:
             queryset = queryset.filter(name__icontains=search_term)
             
-        return queryset.distinct() # Use distinct() to avoid duplicates if a bot matches multiple criteria
+        # A single category id matches at most one row per bot, so no distinct() is needed.
+        # Stable ordering (backed by bot_publicity_name_idx) keeps pages consistent.
+        return queryset.order_by('name', 'id')
 
 class SearchHistoryView(generics.ListCreateAPIView):
     """View to manage a user's search history."""
@@ -43,14 +72,18 @@ class SearchHistoryView(generics.ListCreateAPIView):
     permission_classes = [IsAuthenticated]
 
     def get_queryset(self):
-        return SearchHistory.objects.filter(user=self.request.user)[:5]
+        return SearchHistory.objects.filter(user=self.request.user).only('id', 'term', 'timestamp')[:5]
 
     def perform_create(self, serializer):
-        term = serializer.validated_data['term']
-        obj, created = SearchHistory.objects.update_or_create(
-            user=self.request.user, term=term,
-            defaults={'timestamp': serializer.validated_data.get('timestamp')}
+        # Single INSERT ... ON CONFLICT (user, term) DO UPDATE: one round-trip and
+        # race-safe under unique_together. Repeating a search just bumps its timestamp.
+        objs = SearchHistory.objects.bulk_create(
+            [SearchHistory(user=self.request.user, term=serializer.validated_data['term'], timestamp=timezone.now())],
+            update_conflicts=True,
+            update_fields=['timestamp'],
+            unique_fields=['user', 'term'],
         )
+        serializer.instance = objs[0]
 
     def delete(self, request, *args, **kwargs):
         SearchHistory.objects.filter(user=self.request.user).delete()
@@ -1,47 +1,52 @@
 from google import genai
+import functools
 import os
 from dotenv import load_dotenv
 
 
-# Carregar as variáveis de ambiente do ficheiro .env
-load_dotenv()
+@functools.lru_cache(maxsize=1)
+def get_client():
+    """Cliente da API criado uma única vez por processo."""
+    return genai.Client(api_key=os.environ["GEMINI_API_KEY"])
 
 
-# Configurar a API com a sua chave
-api_key = os.getenv("GEMINI_API_KEY")
-if not api_key:
-    print("ERRO: A variável GEMINI_API_KEY não foi encontrada no ficheiro .env")
-else:
-    # Criar o cliente com a chave de API
-    client = genai.Client(api_key=api_key)
-    
+def _print_models(models, action_name):
+    for m in models:
+        # Verificar se o modelo suporta a ação pedida
+        if hasattr(m, 'supported_actions') and m.supported_actions and action_name in m.supported_actions:
+            print(f"{m.name}")
+
+
+def main():
+    # Carregar as variáveis de ambiente do ficheiro .env
+    load_dotenv()
+
+    # Configurar a API com a sua chave
+    if not os.getenv("GEMINI_API_KEY"):
+        print("ERRO: A variável GEMINI_API_KEY não foi encontrada no ficheiro .env")
+        return
+
     print("A procurar por modelos disponíveis para a sua chave de API...")
     print("-" * 30)
-    
+
     try:
-        # Listar todos os modelos que suportam o método 'generateContent'
+        # Uma única listagem, reutilizada para as duas ações
+        models = list(get_client().models.list())
+
         print("Modelos que suportam generateContent:\n")
-        for m in client.models.list():
-            # Verificar se o modelo suporta a ação 'generateContent'
-            if hasattr(m, 'supported_actions') and m.supported_actions:
-                for action in m.supported_actions:
-                    if action == "generateContent":
-                        print(f"{m.name}")
-                        break
-        
+        _print_models(models, "generateContent")
+
         print("\n" + "-" * 30)
         print("Modelos que suportam embedContent:\n")
-        for m in client.models.list():
-            # Verificar se o modelo suporta a ação 'embedContent'
-            if hasattr(m, 'supported_actions') and m.supported_actions:
-                for action in m.supported_actions:
-                    if action == "embedContent":
-                        print(f"{m.name}")
-                        break
-                        
+        _print_models(models, "embedContent")
+
     except Exception as e:
         print(f"Ocorreu um erro ao contactar a API da Google: {e}")
 
-
     print("-" * 30)
     print("Copie um dos nomes da lista acima (ex: gemini-2.0-flash-exp) e use-o no seu código.")
+
+
+# Só executa (e acede à rede) quando chamado pela linha de comando
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,27 @@
+# Generated by Django 5.1.5 on 2026-10-16 12:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("studio", "0006_knowledgesource_rag_status"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="knowledgeartifact",
+            index=models.Index(
+                fields=["chat", "-created_at"], name="artifact_chat_created_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="knowledgeartifact",
+            index=models.Index(
+                condition=models.Q(("status", "processing")),
+                fields=["created_at"],
+                name="artifact_processing_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.5 on 2026-10-16 12:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("studio", "0007_knowledgeartifact_indexes"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="knowledgeartifact",
+            name="media_url",
+            field=models.CharField(blank=True, max_length=512, null=True),
+        ),
+    ]
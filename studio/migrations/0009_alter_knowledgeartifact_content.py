@@ -0,0 +1,19 @@
+# Generated by Django 5.1.5 on 2026-10-16 12:00
+
+import config.encoders
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("studio", "0008_alter_knowledgeartifact_media_url"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="knowledgeartifact",
+            name="content",
+            field=models.JSONField(blank=True, encoder=config.encoders.ORJSONEncoder, null=True),
+        ),
+    ]
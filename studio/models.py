@@ -1,6 +1,7 @@
 from django.db import models
 from django.conf import settings
 from chat.models import Chat
+from config.encoders import ORJSONEncoder
 
 class KnowledgeSource(models.Model):
     class SourceType(models.TextChoices):
@@ -23,6 +24,19 @@ class KnowledgeSource(models.Model):
     # Metadata (e.g. YouTube ID, author, duration)
     metadata = models.JSONField(default=dict, blank=True)
 
+    # Indexing state for sources ingested in the background (chat uploads)
+    RAG_STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('indexed', 'Indexed'),
+        ('failed', 'Failed'),
+    ]
+    rag_status = models.CharField(
+        max_length=10,
+        choices=RAG_STATUS_CHOICES,
+        null=True,
+        blank=True
+    )
+
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -72,10 +86,12 @@ class KnowledgeArtifact(models.Model):
     )
 
     # Polymorphic content (JSON structure differs by type)
-    content = models.JSONField(null=True, blank=True)
+    # Generated artifacts can be large; orjson serializes them on every write
+    content = models.JSONField(null=True, blank=True, encoder=ORJSONEncoder)
 
     # Specific fields for Podcast or other media
-    media_url = models.URLField(null=True, blank=True)
+    # External URL, or a storage path (e.g. "podcasts/x.mp3") resolved by get_media_url()
+    media_url = models.CharField(max_length=512, null=True, blank=True)
     duration = models.CharField(max_length=20, null=True, blank=True) # "5:30", "10:00"
 
     # Optional score if we want to store user performance on a quiz artifact here?
@@ -84,5 +100,32 @@ class KnowledgeArtifact(models.Model):
 
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            # Per-chat artifact listing, newest first
+            models.Index(fields=['chat', '-created_at'], name='artifact_chat_created_idx'),
+            # Only in-flight artifacts: tiny index for stuck-job checks and dashboards
+            models.Index(
+                fields=['created_at'],
+                condition=models.Q(status='processing'),
+                name='artifact_processing_idx'
+            ),
+        ]
+
+    def get_media_url(self):
+        """
+        Public URL of the media: http(s) URLs and site-relative paths pass
+        through, storage paths get MEDIA_URL. Protocol-relative values
+        ("//host", "/\\host") are never passed through, so they cannot point
+        the export redirect at another site.
+        """
+        url = self.media_url
+        if not url or url.startswith(('http://', 'https://')):
+            return url
+        if url.startswith('/') and url[1:2] not in ('/', '\\'):
+            return url
+        path = url.lstrip('/\\')
+        return f"{settings.MEDIA_URL}{path}"
+
     def __str__(self):
         return f"{self.type}: {self.title} ({self.status})"
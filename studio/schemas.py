@@ -4,6 +4,11 @@
 # conflitos de versão ou namespace com o SDK google.genai (types.Type).
 # O SDK aceita dicionários crus para response_schema.
 
+__all__ = [
+    'QUIZ_SCHEMA', 'FLASHCARD_SCHEMA', 'SUMMARY_SCHEMA', 'SLIDE_SCHEMA', 'PODCAST_SCRIPT_SCHEMA',
+    'QUIZ_CONTENT_SCHEMA', 'FLASHCARD_CONTENT_SCHEMA', 'SLIDE_CONTENT_SCHEMA',
+]
+
 # Esquema para Quiz
 QUIZ_SCHEMA = {
     "type": "ARRAY",
@@ -62,3 +67,53 @@ SLIDE_SCHEMA = {
         "required": ["title", "bullets"]
     }
 }
+
+# Esquema para o roteiro do Podcast (diálogo entre os dois apresentadores)
+PODCAST_SCRIPT_SCHEMA = {
+    "type": "ARRAY",
+    "items": {
+        "type": "OBJECT",
+        "properties": {
+            "speaker": {"type": "STRING", "enum": ["Host (Alex)", "Guest (Jamie)"]},
+            "text": {"type": "STRING"}
+        },
+        "required": ["speaker", "text"]
+    }
+}
+
+
+# -----------------------------------------------------------------------------
+# Validação do content enviado à API (JSON Schema padrão, compilado pelo
+# fastjsonschema no serializer). Exigem só o que o contrato da API sempre
+# exigiu: lista de objetos com as chaves obrigatórias e listas onde há listas.
+# -----------------------------------------------------------------------------
+
+QUIZ_CONTENT_SCHEMA = {
+    "type": "array",
+    "items": {
+        "type": "object",
+        "required": ["question", "options", "correctAnswerIndex"],
+        "properties": {
+            "options": {"type": "array"}
+        }
+    }
+}
+
+SLIDE_CONTENT_SCHEMA = {
+    "type": "array",
+    "items": {
+        "type": "object",
+        "required": ["title", "bullets"],
+        "properties": {
+            "bullets": {"type": "array"}
+        }
+    }
+}
+
+FLASHCARD_CONTENT_SCHEMA = {
+    "type": "array",
+    "items": {
+        "type": "object",
+        "required": ["front", "back"]
+    }
+}
@@ -1,5 +1,10 @@
+import fastjsonschema
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.core.validators import URLValidator
 from rest_framework import serializers
+from bots.models import Bot
 from .models import KnowledgeArtifact, KnowledgeSource, StudySpace
+from .schemas import QUIZ_CONTENT_SCHEMA, FLASHCARD_CONTENT_SCHEMA, SLIDE_CONTENT_SCHEMA
 
 class MultipartListField(serializers.ListField):
     """
@@ -21,6 +26,17 @@ class KnowledgeArtifactSerializer(serializers.ModelSerializer):
     # Input field for Podcast duration (Short/Medium/Long)
     duration = serializers.CharField(write_only=True, required=False)
 
+    # Write-only generation config: read by the view, never stored on the model
+    _CONFIG_FIELDS = ('quantity', 'difficulty', 'source_ids', 'custom_instructions', 'duration')
+
+    # Content validators per artifact type, compiled once at class creation
+    # (fastjsonschema generates plain Python code); types without one are not checked
+    _CONTENT_VALIDATORS = {
+        KnowledgeArtifact.ArtifactType.QUIZ: fastjsonschema.compile(QUIZ_CONTENT_SCHEMA),
+        KnowledgeArtifact.ArtifactType.SLIDE: fastjsonschema.compile(SLIDE_CONTENT_SCHEMA),
+        KnowledgeArtifact.ArtifactType.FLASHCARD: fastjsonschema.compile(FLASHCARD_CONTENT_SCHEMA),
+    }
+
     class Meta:
         model = KnowledgeArtifact
         fields = [
@@ -39,87 +55,72 @@ class KnowledgeArtifactSerializer(serializers.ModelSerializer):
             'status': {'read_only': True}
         }
 
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        # Storage paths are resolved here, so the stored value survives a MEDIA_URL/CDN change
+        data['media_url'] = instance.get_media_url()
+        return data
+
     def create(self, validated_data):
         # Remove fields that are not part of the model
-        validated_data.pop('quantity', None)
-        validated_data.pop('difficulty', None)
-        validated_data.pop('source_ids', None)
-        validated_data.pop('custom_instructions', None)
-        validated_data.pop('duration', None)
+        for field in self._CONFIG_FIELDS:
+            validated_data.pop(field, None)
 
         return super().create(validated_data)
 
+    _validate_http_url = URLValidator(schemes=['http', 'https'])
+
+    def validate_media_url(self, value):
+        """
+        Accepts an http(s) URL or a relative storage path (e.g. "podcasts/x.mp3").
+        Anything else could turn the export redirect into an open redirect.
+        """
+        if not value:
+            return value
+        if value.startswith(('http://', 'https://')):
+            try:
+                self._validate_http_url(value)
+            except DjangoValidationError:
+                raise serializers.ValidationError("Enter a valid URL.")
+            return value
+        if value.startswith(('/', '\\')) or ':' in value or '..' in value.replace('\\', '/').split('/'):
+            raise serializers.ValidationError("Enter an http(s) URL or a relative media path.")
+        return value
+
+    @classmethod
+    def content_is_valid(cls, content, artifact_type):
+        """
+        Pass/fail check of content for callers that do not need the error message
+        (bulk imports); skips building a ValidationError.
+        """
+        validator = cls._CONTENT_VALIDATORS.get(artifact_type)
+        if validator is None or not content:
+            return True
+        try:
+            validator(content)
+        except fastjsonschema.JsonSchemaValueException:
+            return False
+        return True
+
     def validate(self, data):
         """
         Validate content structure based on artifact type.
         """
-        artifact_type = data.get('type')
         content = data.get('content')
 
         # SKIP validation if content is missing or null
         if not content:
             return data
 
-        try:
-            if artifact_type == KnowledgeArtifact.ArtifactType.QUIZ:
-                self._validate_quiz(content)
-            elif artifact_type == KnowledgeArtifact.ArtifactType.SLIDE:
-                self._validate_slide(content)
-            elif artifact_type == KnowledgeArtifact.ArtifactType.FLASHCARD:
-                self._validate_flashcard(content)
-        except Exception as e:
-            # Catch unexpected validation logic errors and re-raise as ValidationError
-            if isinstance(e, serializers.ValidationError):
-                raise e
-            raise serializers.ValidationError({"content": f"Invalid format: {str(e)}"})
+        validator = self._CONTENT_VALIDATORS.get(data.get('type'))
+        if validator is not None:
+            try:
+                validator(content)
+            except fastjsonschema.JsonSchemaValueException as e:
+                raise serializers.ValidationError({"content": f"Invalid format: {e.message}"})
 
         return data
 
-    def _validate_quiz(self, content):
-        if not isinstance(content, list):
-            raise serializers.ValidationError({"content": "Quiz content must be a list of questions."})
-
-        for idx, item in enumerate(content):
-            if not isinstance(item, dict):
-                raise serializers.ValidationError({"content": f"Item {idx} must be a dictionary."})
-
-            required = ['question', 'options', 'correctAnswerIndex']
-            for field in required:
-                if field not in item:
-                    raise serializers.ValidationError({"content": f"Item {idx} missing required field '{field}'."})
-
-            if not isinstance(item['options'], list):
-                raise serializers.ValidationError({"content": f"Item {idx} 'options' must be a list."})
-
-    def _validate_slide(self, content):
-        if not isinstance(content, list):
-            raise serializers.ValidationError({"content": "Slide content must be a list of pages."})
-
-        for idx, item in enumerate(content):
-            if not isinstance(item, dict):
-                raise serializers.ValidationError({"content": f"Item {idx} must be a dictionary."})
-
-            required = ['title', 'bullets']
-            for field in required:
-                if field not in item:
-                    raise serializers.ValidationError({"content": f"Item {idx} missing required field '{field}'."})
-
-            if not isinstance(item['bullets'], list):
-                raise serializers.ValidationError({"content": f"Item {idx} 'bullets' must be a list."})
-
-    def _validate_flashcard(self, content):
-        if not isinstance(content, list):
-            raise serializers.ValidationError({"content": "Flashcard content must be a list of cards."})
-
-        for idx, item in enumerate(content):
-            if not isinstance(item, dict):
-                raise serializers.ValidationError({"content": f"Item {idx} must be a dictionary."})
-
-            required = ['front', 'back']
-            for field in required:
-                if field not in item:
-                    raise serializers.ValidationError({"content": f"Item {idx} missing required field '{field}'."})
-
 class KnowledgeSourceSerializer(serializers.ModelSerializer):
     class Meta:
         model = KnowledgeSource
@@ -150,6 +151,15 @@ class StudySpaceSerializer(serializers.ModelSerializer):
         fields = ['id', 'title', 'description', 'cover_image', 'sources', 'source_ids', 'bot_ids', 'bots', 'created_at', 'updated_at']
         read_only_fields = ['id', 'created_at', 'updated_at']
 
+    def validate_bot_ids(self, value):
+        # Ids inexistentes quebrariam o bots.set() com IntegrityError (500)
+        bot_ids = set(value)
+        found = set(Bot.objects.filter(id__in=bot_ids).values_list('id', flat=True))
+        missing = sorted(bot_ids - found)
+        if missing:
+            raise serializers.ValidationError(f"Invalid bot ids: {missing}")
+        return list(bot_ids)
+
     def create(self, validated_data):
         source_ids = validated_data.pop('source_ids', [])
         bot_ids = validated_data.pop('bot_ids', [])
@@ -159,9 +169,7 @@ class StudySpaceSerializer(serializers.ModelSerializer):
         if source_ids:
             space.sources.set(source_ids)
         if bot_ids:
-            from bots.models import Bot
-            bots = Bot.objects.filter(id__in=bot_ids)
-            space.bots.set(bots)
+            space.bots.set(bot_ids)
             
         return space
 
@@ -174,9 +182,7 @@ class StudySpaceSerializer(serializers.ModelSerializer):
         if source_ids is not None:
             instance.sources.set(source_ids)
         if bot_ids is not None:
-            from bots.models import Bot
-            bots = Bot.objects.filter(id__in=bot_ids)
-            instance.bots.set(bots)
+            instance.bots.set(bot_ids)
             
         return instance
 
@@ -1,7 +1,9 @@
+import io
 import os
+import functools
 import logging
 import uuid
-import tempfile
+import subprocess
 import concurrent.futures
 from django.conf import settings
 from pydub import AudioSegment
@@ -9,6 +11,52 @@ from chat.services.tts_service import generate_tts_audio
 
 logger = logging.getLogger(__name__)
 
+# Concurrent TTS calls per podcast (the work is network-bound)
+MAX_TTS_WORKERS = 5
+
+# Voice Mapping (speaker label in the script -> TTS voice)
+VOICE_MAP = {
+    "Host (Alex)": "Kore",
+    "Guest (Jamie)": "Fenrir"
+}
+
+# ffmpeg raw PCM formats by sample width (bytes)
+_PCM_FORMATS = {1: 'u8', 2: 's16le', 4: 's32le'}
+
+
+def _export_mp3(pcm: bytes, frame_rate: int, channels: int, sample_width: int, output_path: str):
+    """
+    Encodes raw PCM to MP3 by piping it into ffmpeg. AudioSegment.export would
+    first write the whole mix to a temporary WAV and then hand that to ffmpeg.
+    """
+    try:
+        subprocess.run(
+            [
+                AudioSegment.converter, '-y', '-loglevel', 'error',
+                '-f', _PCM_FORMATS[sample_width], '-ar', str(frame_rate), '-ac', str(channels),
+                '-i', 'pipe:0',
+                '-f', 'mp3', '-b:a', '128k', output_path
+            ],
+            input=pcm,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.PIPE,
+            check=True
+        )
+    except subprocess.CalledProcessError as e:
+        # str(e) only carries the exit code; the reason is in ffmpeg's stderr
+        stderr = (e.stderr or b'').decode('utf-8', errors='replace').strip()
+        logger.error(f"ffmpeg failed with exit code {e.returncode}: {stderr}")
+        raise
+
+
+@functools.lru_cache(maxsize=1)
+def _podcast_dir() -> str:
+    """Podcast output directory, created on first use only (not once per mix)."""
+    output_dir = os.path.join(settings.MEDIA_ROOT, 'podcasts')
+    os.makedirs(output_dir, exist_ok=True)
+    return output_dir
+
+
 class AudioMixerService:
     @staticmethod
     def mix_podcast(script: list) -> str:
@@ -20,13 +68,9 @@ class AudioMixerService:
         if not script:
             raise ValueError("Script is empty.")
 
-        # Voice Mapping
-        voice_map = {
-            "Host (Alex)": "Kore",
-            "Guest (Jamie)": "Fenrir"
-        }
+        # Bound once: looked up by every turn's worker
+        voice_for = VOICE_MAP.get
 
-        temp_files = []
         # Store segments in order: {index: AudioSegment}
         segments_map = {}
 
@@ -36,68 +80,69 @@ class AudioMixerService:
             if not text:
                 return None
 
-            voice = voice_map.get(speaker, "Kore")
+            voice = voice_for(speaker, "Kore")
 
-            with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as tf:
-                temp_path = tf.name
+            # WAV stays in memory: no temp file write, reread and delete per turn
+            buffer = io.BytesIO()
+            result = generate_tts_audio(text, buffer, voice_name=voice)
 
-            # This is thread-safe as temp_path is unique per call
-            result = generate_tts_audio(text, temp_path, voice_name=voice)
-
-            if result.get('success'):
-                return (index, temp_path)
-            else:
+            if not result.get('success'):
                 logger.warning(f"Failed to generate audio for turn {index}: {result.get('error')}")
-                if os.path.exists(temp_path):
-                    os.remove(temp_path)
+                return None
+
+            # Decode in the worker, so segment decoding overlaps with the
+            # other turns' TTS calls instead of running one by one afterwards
+            buffer.seek(0)
+            try:
+                return (index, AudioSegment.from_wav(buffer))
+            except Exception as e:
+                logger.error(f"Error decoding audio for turn {index}: {e}")
                 return None
 
         try:
             # Parallel Execution
-            with concurrent.futures.ThreadPoolExecutor(max_workers=5) as executor:
-                futures = []
-                for i, turn in enumerate(script):
-                    futures.append(executor.submit(process_turn, i, turn))
+            # No more threads than turns: short scripts do not spin up an idle pool
+            with concurrent.futures.ThreadPoolExecutor(max_workers=min(MAX_TTS_WORKERS, len(script))) as executor:
+                futures = [executor.submit(process_turn, i, turn) for i, turn in enumerate(script)]
 
                 for future in concurrent.futures.as_completed(futures):
                     result = future.result()
                     if result:
-                        idx, path = result
-                        temp_files.append(path)
-                        try:
-                            seg = AudioSegment.from_wav(path)
-                            segments_map[idx] = seg
-                        except Exception as e:
-                            logger.error(f"Error reading WAV {path}: {e}")
+                        idx, seg = result
+                        segments_map[idx] = seg
 
-            # Mix in Order
-            full_audio = AudioSegment.empty()
-            silence = AudioSegment.silent(duration=300)
+            if not segments_map:
+                raise ValueError("No audio generated for any turn.")
 
-            # Iterate by original index to preserve order
+            # Mix in Order
+            # Silence in the TTS format: the raw PCM below is joined as-is
+            ref = next(iter(segments_map.values()))
+            silence = (
+                AudioSegment.silent(duration=300, frame_rate=ref.frame_rate)
+                .set_channels(ref.channels)
+                .set_sample_width(ref.sample_width)
+            ).raw_data
+
+            # Iterate by original index to preserve order. The PCM is joined
+            # once instead of `full_audio +=`, which copied the whole mix per turn
+            parts = []
             for i in range(len(script)):
-                if i in segments_map:
-                    full_audio += segments_map[i]
-                    full_audio += silence
+                seg = segments_map.get(i)
+                if seg is None:
+                    continue
+                if (seg.frame_rate, seg.channels, seg.sample_width) != (ref.frame_rate, ref.channels, ref.sample_width):
+                    seg = seg.set_frame_rate(ref.frame_rate).set_channels(ref.channels).set_sample_width(ref.sample_width)
+                parts.append(seg.raw_data)
+                parts.append(silence)
 
             # Export Final Mix
             filename = f"podcast_mix_{uuid.uuid4().hex[:10]}.mp3"
-            output_dir = os.path.join(settings.MEDIA_ROOT, 'podcasts')
-            os.makedirs(output_dir, exist_ok=True)
-
-            output_path = os.path.join(output_dir, filename)
+            output_path = os.path.join(_podcast_dir(), filename)
 
-            full_audio.export(output_path, format="mp3", bitrate="128k")
+            _export_mp3(b"".join(parts), ref.frame_rate, ref.channels, ref.sample_width, output_path)
 
             return f"podcasts/{filename}"
 
         except Exception as e:
             logger.error(f"Error mixing podcast: {e}")
             raise e
-        finally:
-            # Cleanup temp files
-            for f in temp_files:
-                if os.path.exists(f):
-                    try:
-                        os.remove(f)
-                    except: pass
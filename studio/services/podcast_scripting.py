@@ -1,7 +1,8 @@
-import json
+import orjson
 import logging
 from google.genai import types
 from chat.services.ai_client import get_ai_client, get_model
+from studio.schemas import PODCAST_SCRIPT_SCHEMA
 
 logger = logging.getLogger(__name__)
 
@@ -15,19 +16,6 @@ class PodcastScriptingService:
         client = get_ai_client()
         model_name = get_model('chat')
 
-        # Define Schema
-        script_schema = types.Schema(
-            type=types.Type.ARRAY,
-            items=types.Schema(
-                type=types.Type.OBJECT,
-                properties={
-                    "speaker": types.Schema(type=types.Type.STRING, enum=["Host (Alex)", "Guest (Jamie)"]),
-                    "text": types.Schema(type=types.Type.STRING)
-                },
-                required=["speaker", "text"]
-            )
-        )
-
         prompt = (
             f"Create an engaging, educational podcast script titled '{title}'.\n"
             f"Hosts: 'Host (Alex)' (enthusiastic, guide) and 'Guest (Jamie)' (curious, insightful).\n"
@@ -44,16 +32,16 @@ class PodcastScriptingService:
                 contents=prompt,
                 config=types.GenerateContentConfig(
                     response_mime_type="application/json",
-                    response_schema=script_schema,
+                    response_schema=PODCAST_SCRIPT_SCHEMA,
                     temperature=0.7
                 )
             )
 
-            if response.parsed:
+            # The SDK already decoded the JSON against the schema; the text is
+            # only parsed again when it could not (parsed is None)
+            if response.parsed is not None:
                 return response.parsed
-            else:
-                # Fallback
-                return json.loads(response.text)
+            return orjson.loads(response.text)
 
         except Exception as e:
             logger.error(f"Error generating podcast script: {e}")
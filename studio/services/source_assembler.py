@@ -1,10 +1,34 @@
+import hashlib
 import logging
+from django.conf import settings
+from django.core.cache import cache
 from chat.models import ChatMessage
 from chat.file_processor import FileProcessor
 from chat.services.token_service import TokenService
 
 logger = logging.getLogger(__name__)
 
+# Tempo de vida (segundos) do contexto montado para um chat + seleção de fontes
+CONTEXT_CACHE_TTL = getattr(settings, 'STUDIO_CONTEXT_CACHE_TTL', 60 * 15)
+
+
+def _context_key(chat_id: int, source_ids, max_tokens: int) -> str:
+    """
+    Chave do contexto montado; a ordem da seleção não importa.
+    Inclui o estado atual das mensagens selecionadas (id, arquivo e nome):
+    apagar uma mensagem ou trocar o anexo muda a chave, sem depender de
+    invalidação explícita.
+    """
+    rows = (
+        ChatMessage.objects.filter(id__in=source_ids, chat_id=chat_id)
+        .order_by('id')
+        .values_list('id', 'attachment', 'original_filename')
+    )
+    state = ';'.join(f"{mid}:{attachment}:{name}" for mid, attachment, name in rows)
+    digest = hashlib.blake2b(f"{chat_id}|{state}|{max_tokens}".encode('utf-8'), digest_size=16).hexdigest()
+    return f"art:ctx:{digest}"
+
+
 class SourceAssemblyService:
     # Safety limit for context (Gemini 1.5 Pro is 1M+, Flash is 1M. We set a safe margin)
     MAX_CONTEXT_TOKENS = 800_000
@@ -22,11 +46,36 @@ class SourceAssemblyService:
         Returns:
             str: O contexto montado pronto para o LLM.
         """
+        source_ids = config.get('selectedSourceIds', [])
+        if not source_ids:
+            return ""
+
+        # Gerações seguidas sobre as mesmas fontes reutilizam o contexto já montado
+        key = _context_key(chat_id, source_ids, SourceAssemblyService.MAX_CONTEXT_TOKENS)
+        context = cache.get(key)
+        if context is not None:
+            logger.info(f"Using cached context for chat {chat_id}")
+            return context
+
+        context, complete = SourceAssemblyService._assemble_context(chat_id, source_ids)
+        # Falhas de leitura podem ser transitórias: esse contexto não vai para o cache
+        if complete:
+            cache.set(key, context, CONTEXT_CACHE_TTL)
+        return context
+
+    @staticmethod
+    def _assemble_context(chat_id: int, source_ids) -> tuple:
+        """
+        Monta o contexto a partir das mensagens selecionadas.
+
+        Returns:
+            tuple: (contexto, True se nenhum arquivo falhou na leitura).
+        """
         context_parts = []
         current_tokens = 0
+        complete = True
 
         # 1. Processar Arquivos Selecionados
-        source_ids = config.get('selectedSourceIds', [])
         if source_ids:
             messages = ChatMessage.objects.filter(id__in=source_ids, chat_id=chat_id)
 
@@ -80,5 +129,6 @@ class SourceAssemblyService:
                     except Exception as e:
                         logger.error(f"Erro ao processar arquivo da mensagem {message.id}: {e}")
                         context_parts.append(f"\n--- FILE: {message.original_filename} ---\n[Erro ao ler arquivo]")
+                        complete = False
 
-        return "\n".join(context_parts)
+        return "\n".join(context_parts), complete
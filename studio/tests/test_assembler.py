@@ -1,3 +1,4 @@
+from django.core.cache import cache
 from django.test import TestCase
 from unittest.mock import patch, MagicMock
 from chat.models import Chat, ChatMessage
@@ -11,6 +12,7 @@ User = get_user_model()
 
 class SourceAssemblerTest(TestCase):
     def setUp(self):
+        cache.clear()
         # Setup básico de usuário, bot e chat
         self.user = User.objects.create(username="testuser")
         # Bot tem 'owner' em vez de 'user'
@@ -145,3 +147,53 @@ class SourceAssemblerTest(TestCase):
         self.assertIn("--- FILE: dummy.txt ---", result)
         self.assertIn("Texto do Arquivo", result)
         self.assertNotIn("--- CHAT HISTORY ---", result)
+
+    @patch('chat.file_processor.FileProcessor.extract_text')
+    def test_get_context_served_from_cache(self, mock_extract):
+        """Mesma seleção (em qualquer ordem) reutiliza o contexto montado com uma única consulta leve."""
+        msg1 = ChatMessage.objects.create(
+            chat=self.chat, role='user', attachment="a.txt", original_filename="a.txt"
+        )
+        msg2 = ChatMessage.objects.create(
+            chat=self.chat, role='user', attachment="b.txt", original_filename="b.txt"
+        )
+        mock_extract.return_value = "Texto"
+
+        result1 = SourceAssemblyService.get_context_from_config(
+            self.chat.id, {"selectedSourceIds": [msg1.id, msg2.id]}
+        )
+
+        # Só a leitura de (id, anexo, nome) que compõe a chave; nada é remontado
+        with self.assertNumQueries(1):
+            result2 = SourceAssemblyService.get_context_from_config(
+                self.chat.id, {"selectedSourceIds": [msg2.id, msg1.id]}
+            )
+
+        self.assertEqual(result1, result2)
+        self.assertEqual(mock_extract.call_count, 2)
+
+    @patch('chat.file_processor.FileProcessor.extract_text')
+    def test_cached_context_follows_source_changes(self, mock_extract):
+        """Apagar uma fonte ou trocar o anexo não serve o contexto antigo do cache."""
+        msg1 = ChatMessage.objects.create(
+            chat=self.chat, role='user', attachment="a.txt", original_filename="a.txt"
+        )
+        msg2 = ChatMessage.objects.create(
+            chat=self.chat, role='user', attachment="b.txt", original_filename="b.txt"
+        )
+        mock_extract.side_effect = lambda path, mime_type=None: f"Texto de {path.rsplit('/', 1)[-1]}"
+        config = {"selectedSourceIds": [msg1.id, msg2.id]}
+
+        result = SourceAssemblyService.get_context_from_config(self.chat.id, config)
+        self.assertIn("Texto de b.txt", result)
+
+        msg2.delete()
+        result = SourceAssemblyService.get_context_from_config(self.chat.id, config)
+        self.assertNotIn("b.txt", result)
+
+        ChatMessage.objects.filter(pk=msg1.pk).update(
+            attachment="c.txt", original_filename="c.txt", extracted_text=None
+        )
+        result = SourceAssemblyService.get_context_from_config(self.chat.id, config)
+        self.assertIn("Texto de c.txt", result)
+        self.assertNotIn("a.txt", result)
@@ -7,6 +7,7 @@ from chat.models import Chat
 from bots.models import Bot
 from studio.models import KnowledgeArtifact
 from studio.schemas import QUIZ_SCHEMA
+from chat.services.ai_client import get_ai_client
 import json
 
 User = get_user_model()
@@ -18,6 +19,9 @@ class ArtifactGenerationTest(TestCase):
         self.client.force_authenticate(user=self.user)
         self.bot = Bot.objects.create(name="TestBot", owner=self.user)
         self.chat = Chat.objects.create(user=self.user, bot=self.bot)
+        # O client é cacheado por processo: cada teste usa o seu mock de genai.Client
+        get_ai_client.cache_clear()
+        self.addCleanup(get_ai_client.cache_clear)
 
     @patch('studio.views.threading.Thread') # Mock threading
     @patch('chat.services.ai_client.genai.Client')
@@ -49,10 +53,9 @@ class ArtifactGenerationTest(TestCase):
                 "correctAnswerIndex": 0
             }
         ]
-        mock_response.parsed = expected_content
         mock_response.text = json.dumps(expected_content)
 
-        mock_client_instance.models.generate_content.return_value = mock_response
+        mock_client_instance.models.generate_content_stream.return_value = iter([mock_response])
         mock_genai_client.return_value = mock_client_instance
 
         payload = {
@@ -78,8 +81,8 @@ class ArtifactGenerationTest(TestCase):
         self.assertEqual(artifact.content[0]['question'], "Q1")
 
         # Verifica chamadas da IA
-        mock_client_instance.models.generate_content.assert_called_once()
-        args, kwargs = mock_client_instance.models.generate_content.call_args
+        mock_client_instance.models.generate_content_stream.assert_called_once()
+        args, kwargs = mock_client_instance.models.generate_content_stream.call_args
         self.assertIn('config', kwargs)
 
         # Verifica assembler
@@ -103,10 +106,9 @@ class ArtifactGenerationTest(TestCase):
 
         mock_client_instance = MagicMock()
         mock_response = MagicMock()
-        mock_response.parsed = None
         mock_response.text = '{"summary": "Resumo gerado", "key_points": ["P1"]}'
 
-        mock_client_instance.models.generate_content.return_value = mock_response
+        mock_client_instance.models.generate_content_stream.return_value = iter([mock_response])
         mock_genai_client.return_value = mock_client_instance
 
         payload = {
@@ -119,3 +121,37 @@ class ArtifactGenerationTest(TestCase):
 
         artifact = KnowledgeArtifact.objects.get(title="My Summary")
         self.assertEqual(artifact.content['summary'], "Resumo gerado")
+
+    @patch('studio.views.time.sleep')
+    @patch('studio.views.threading.Thread')
+    @patch('chat.services.ai_client.genai.Client')
+    @patch('chat.services.ai_client.get_model')
+    @patch('studio.services.source_assembler.SourceAssemblyService.get_context_from_config')
+    def test_generate_retries_transient_failure(self, mock_assembler, mock_get_model, mock_genai_client, mock_thread, mock_sleep):
+        """Falha transitória do provedor é repetida com backoff em vez de virar ERROR."""
+
+        def side_effect(target, args):
+            target(*args)
+            return MagicMock()
+        mock_thread.side_effect = side_effect
+
+        mock_assembler.return_value = "Texto."
+
+        mock_client_instance = MagicMock()
+        mock_response = MagicMock()
+        mock_response.text = json.dumps([{"front": "F", "back": "B"}])
+        mock_client_instance.models.generate_content_stream.side_effect = [TimeoutError("timeout"), iter([mock_response])]
+        mock_genai_client.return_value = mock_client_instance
+
+        payload = {
+            "chat": self.chat.id,
+            "type": "FLASHCARD",
+            "title": "My Cards"
+        }
+
+        self.client.post('/api/v1/studio/artifacts/', payload, format='json')
+
+        artifact = KnowledgeArtifact.objects.get(title="My Cards")
+        self.assertEqual(artifact.status, KnowledgeArtifact.Status.READY)
+        self.assertEqual(mock_client_instance.models.generate_content_stream.call_count, 2)
+        mock_sleep.assert_called_once()
@@ -5,6 +5,7 @@ from unittest.mock import patch, MagicMock
 from bots.models import Bot
 from chat.models import Chat
 from studio.models import KnowledgeArtifact
+from studio.serializers import KnowledgeArtifactSerializer
 from chat.services.content_extractor import ContentExtractor
 
 User = get_user_model()
@@ -101,6 +102,54 @@ class StudioIntegrationTests(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
         self.assertIn('type', response.data)
 
+    def test_invalid_quiz_content(self):
+        """
+        Content fora do formato do tipo é rejeitado pelo validador compilado
+        """
+        data = {
+            'chat': self.chat.id,
+            'type': 'QUIZ',
+            'title': 'Broken Quiz',
+            'content': [{"question": "Sem opções", "correctAnswerIndex": 0}]
+        }
+
+        response = self.client.post(self.url, data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('content', response.data)
+
+    def test_content_is_valid(self):
+        """
+        Checagem booleana usa os mesmos validadores compilados
+        """
+        quiz = KnowledgeArtifact.ArtifactType.QUIZ
+        valid = [{"question": "Q", "options": ["A", "B"], "correctAnswerIndex": 0}]
+        broken = [{"question": "Sem opções", "correctAnswerIndex": 0}]
+
+        self.assertTrue(KnowledgeArtifactSerializer.content_is_valid(valid, quiz))
+        self.assertFalse(KnowledgeArtifactSerializer.content_is_valid(broken, quiz))
+        # Tipos sem esquema não são checados
+        self.assertTrue(KnowledgeArtifactSerializer.content_is_valid(broken, KnowledgeArtifact.ArtifactType.SUMMARY))
+
+    def test_media_url_rejects_foreign_redirect_targets(self):
+        """
+        media_url aceita só URL http(s) ou caminho relativo de mídia
+        """
+        def errors_for(media_url):
+            serializer = KnowledgeArtifactSerializer(data={
+                'chat': self.chat.id, 'type': 'PODCAST', 'title': 'P', 'media_url': media_url
+            })
+            serializer.is_valid()
+            return serializer.errors
+
+        self.assertNotIn('media_url', errors_for("https://www.youtube.com/watch?v=abc"))
+        self.assertNotIn('media_url', errors_for("podcasts/x.mp3"))
+        for value in ("//evil.example", "/\\evil.example", "javascript:alert(1)", "../../etc/passwd"):
+            self.assertIn('media_url', errors_for(value))
+
+        # Mesmo valores gravados direto no banco não viram redirect para outro host
+        artifact = KnowledgeArtifact(media_url="//evil.example/x.mp3")
+        self.assertEqual(artifact.get_media_url(), "/media/evil.example/x.mp3")
+
     def test_study_space_crud(self):
         """
         Teste 4: CRUD de Espaços de Estudo
@@ -126,3 +175,20 @@ class StudioIntegrationTests(APITestCase):
         response = self.client.get(f"{url}{space_id}/")
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(response.data['title'], 'My Space')
+
+    def test_study_space_rejects_unknown_bot_ids(self):
+        """
+        Teste 5: bot_ids inexistentes retornam 400 em vez de quebrar o bots.set()
+        """
+        url = '/api/v1/studio/spaces/'
+        data = {'title': 'My Space', 'bot_ids': [self.bot.id, 999999]}
+
+        response = self.client.post(url, data, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('bot_ids', response.json())
+
+        data['bot_ids'] = [self.bot.id]
+        response = self.client.post(url, data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual([b['id'] for b in response.data['bots']], [self.bot.id])
@@ -55,7 +55,8 @@ class PodcastGenerationTest(TestCase):
 
         artifact = KnowledgeArtifact.objects.get(title="My Podcast")
         self.assertEqual(artifact.status, KnowledgeArtifact.Status.READY)
-        self.assertEqual(artifact.media_url, "/media/podcasts/test_mix.mp3")
+        self.assertEqual(artifact.media_url, "podcasts/test_mix.mp3")
+        self.assertEqual(artifact.get_media_url(), "/media/podcasts/test_mix.mp3")
         self.assertEqual(len(artifact.content), 2)
 
         # Verifica chamadas
@@ -66,12 +67,15 @@ class PodcastGenerationTest(TestCase):
         )
         mock_mixer.assert_called_once()
 
+    @patch('studio.services.audio_mixer.subprocess.run')
     @patch('studio.services.audio_mixer.generate_tts_audio')
     @patch('studio.services.audio_mixer.AudioSegment')
     @patch('studio.services.audio_mixer.os.makedirs')
-    def test_audio_mixer_service(self, mock_makedirs, mock_audio_segment, mock_tts):
+    def test_audio_mixer_service(self, mock_makedirs, mock_audio_segment, mock_tts, mock_run):
         """Testa o serviço de mixagem isoladamente com paralelismo."""
-        from studio.services.audio_mixer import AudioMixerService
+        from studio.services.audio_mixer import AudioMixerService, _podcast_dir
+        _podcast_dir.cache_clear()
+        self.addCleanup(_podcast_dir.cache_clear)
 
         script = [
             {"speaker": "Host (Alex)", "text": "Hello"},
@@ -85,8 +89,10 @@ class PodcastGenerationTest(TestCase):
         mock_audio_segment.empty.return_value = mock_segment_instance
         mock_audio_segment.silent.return_value = mock_segment_instance
 
-        mock_segment_instance.__add__.return_value = mock_segment_instance
-        mock_segment_instance.__iadd__.return_value = mock_segment_instance
+        mock_segment_instance.raw_data = b"\x00\x00"
+        mock_segment_instance.sample_width = 2
+        mock_segment_instance.set_channels.return_value = mock_segment_instance
+        mock_segment_instance.set_sample_width.return_value = mock_segment_instance
 
         path = AudioMixerService.mix_podcast(script)
 
@@ -94,4 +100,22 @@ class PodcastGenerationTest(TestCase):
         self.assertTrue(path.endswith(".mp3"))
 
         self.assertEqual(mock_tts.call_count, 2)
-        mock_segment_instance.export.assert_called_once()
+        # O PCM concatenado (dois turnos, cada um seguido de silêncio) vai direto para o ffmpeg
+        mock_run.assert_called_once()
+        self.assertEqual(mock_run.call_args.kwargs['input'], b"\x00\x00" * 4)
+
+    @patch('studio.services.audio_mixer.subprocess.run')
+    def test_export_logs_ffmpeg_stderr(self, mock_run):
+        """Falha do ffmpeg registra o stderr decodificado, não só o código de saída."""
+        import subprocess
+        from studio.services.audio_mixer import _export_mp3
+
+        mock_run.side_effect = subprocess.CalledProcessError(
+            1, ['ffmpeg'], stderr=b"pipe:0: Invalid data found when processing input\n"
+        )
+
+        with self.assertLogs('studio.services.audio_mixer', level='ERROR') as logs, \
+                self.assertRaises(subprocess.CalledProcessError):
+            _export_mp3(b"\x00\x00", 24000, 1, 2, "/tmp/out.mp3")
+
+        self.assertIn("Invalid data found when processing input", logs.output[0])
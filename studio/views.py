@@ -1,17 +1,21 @@
+import functools
 import io
-import json
 import logging
+import orjson
+import random
 import threading
+import time
+from dataclasses import dataclass
+from typing import Optional
 from rest_framework import viewsets, permissions, status, parsers
 from rest_framework.decorators import action
 from rest_framework.response import Response
+from django.conf import settings
 from django.http import HttpResponse
 from django.template.loader import render_to_string
 from django.db import transaction
 from django.core.files import File
-from weasyprint import HTML
-from pptx import Presentation
-from openpyxl import Workbook as ExcelWorkbook
+from google.genai import errors as genai_errors
 from google.genai import types
 
 from chat.models import Chat, ChatMessage
@@ -28,6 +32,91 @@ from .serializers import KnowledgeArtifactSerializer, KnowledgeSourceSerializer,
 
 logger = logging.getLogger(__name__)
 
+# Transient provider failures are retried with backoff; anything else (auth, 400) fails fast
+_RETRYABLE = (TimeoutError, ConnectionError, orjson.JSONDecodeError, genai_errors.ServerError)
+MAX_GENERATION_ATTEMPTS = 3
+
+
+# Caps in-flight Gemini generations across artifact threads, so a burst of
+# requests queues here instead of tripping the provider's rate limit
+_GENERATION_SLOTS = threading.BoundedSemaphore(getattr(settings, 'STUDIO_MAX_CONCURRENT_GENERATIONS', 4))
+
+
+@dataclass(frozen=True, slots=True)
+class ArtifactOptions:
+    """
+    Generation options, resolved once in perform_create and handed to the
+    worker thread. Defaults live here instead of at every read site.
+    """
+    source_ids: tuple = ()
+    difficulty: str = 'Medium'
+    quantity: int = 10
+    custom_instructions: str = ''
+    # Short/Medium/Long; None when the client did not choose one
+    target_duration: Optional[str] = None
+
+
+def _backoff_delay(attempt):
+    """Exponential backoff (0.25s, 0.5s, 1s... capped at 8s) plus jitter."""
+    return min(8, 0.25 * (2 ** attempt)) + random.random() * 0.25
+
+
+# Response schema and task line per artifact type, kept side by side so they cannot drift
+_SCHEMA_BY_TYPE = {
+    KnowledgeArtifact.ArtifactType.QUIZ: (QUIZ_SCHEMA, "Generate exactly {q} questions."),
+    KnowledgeArtifact.ArtifactType.FLASHCARD: (FLASHCARD_SCHEMA, "Generate exactly {q} cards."),
+    KnowledgeArtifact.ArtifactType.SUMMARY: (SUMMARY_SCHEMA, "Generate a comprehensive summary and key points."),
+    KnowledgeArtifact.ArtifactType.SLIDE: (SLIDE_SCHEMA, "Generate exactly {q} slides."),
+}
+
+
+@functools.lru_cache(maxsize=64)
+def _artifact_prompt_skeleton(artifact_type, difficulty, quantity, has_instructions):
+    """
+    Static parts of the artifact prompt for one configuration, memoized.
+    Returns (before_title, after_title, after_context, schema); the prompt is
+    those pieces joined around title, instructions and context.
+    """
+    before_title = (
+        f"You are an expert educational content generator. "
+        f"Create a {artifact_type} titled '"
+    )
+    after_title = (
+        f"'.\n"
+        f"Language: Detect the language from the context (default to Portuguese if unclear).\n"
+        f"Target Audience Difficulty: {difficulty}.\n"
+    )
+
+    if has_instructions:
+        after_title += "CUSTOM INSTRUCTIONS:\n"
+
+    # Types without an entry (spreadsheet, workbook) are generated free-form
+    schema, task = _SCHEMA_BY_TYPE.get(artifact_type, (None, ""))
+
+    return before_title, after_title, "\n" + task.format(q=quantity), schema
+
+
+def _log_generation(artifact, started):
+    """One structured log line per generation, with its total duration."""
+    if logger.isEnabledFor(logging.INFO):
+        logger.info("Artifact generation finished", extra={
+            'artifact_id': artifact.pk,
+            'artifact_type': artifact.type,
+            'status': artifact.status,
+            'duration_ms': round((time.perf_counter() - started) * 1000),
+        })
+
+
+def _set_artifact_state(artifact, status, **fields):
+    """
+    Writes the artifact status (and any result fields) in a single UPDATE,
+    skipping the model save() path, and mirrors the values on the instance.
+    """
+    fields['status'] = status
+    KnowledgeArtifact.objects.filter(pk=artifact.pk).update(**fields)
+    for name, value in fields.items():
+        setattr(artifact, name, value)
+
 class KnowledgeSourceViewSet(viewsets.ModelViewSet):
     """
     API endpoint for managing Library/Knowledge Sources.
@@ -52,8 +141,9 @@ class KnowledgeSourceViewSet(viewsets.ModelViewSet):
                 extracted_text = ContentExtractor.extract_from_url(instance.url)
 
             if extracted_text:
+                # Direct UPDATE: no save() path for a single cached column
+                KnowledgeSource.objects.filter(pk=instance.pk).update(extracted_text=extracted_text)
                 instance.extracted_text = extracted_text
-                instance.save(update_fields=['extracted_text'])
 
         except Exception as e:
             logger.error(f"Error extracting text for KnowledgeSource {instance.id}: {e}")
@@ -215,8 +305,8 @@ class StudySpaceViewSet(viewsets.ModelViewSet):
                 extracted_text = ContentExtractor.extract_from_url(source.url)
 
             if extracted_text:
+                KnowledgeSource.objects.filter(pk=source.pk).update(extracted_text=extracted_text)
                 source.extracted_text = extracted_text
-                source.save(update_fields=['extracted_text'])
         except Exception as e:
             logger.error(f"Error extracting text for Study Space source: {e}")
 
@@ -273,13 +363,17 @@ class KnowledgeArtifactViewSet(viewsets.ModelViewSet):
         request_config = self.request.data.get('config', {})
 
         # Mapeamento estrito do contrato Frontend -> Backend
-        options = {
+        provided = {
             'quantity': request_config.get('quantity') or serializer.validated_data.get('quantity'),
             'difficulty': request_config.get('difficulty') or serializer.validated_data.get('difficulty'),
             'source_ids': request_config.get('selectedSourceIds') or serializer.validated_data.get('source_ids'),
             'custom_instructions': request_config.get('customInstructions') or serializer.validated_data.get('custom_instructions'),
             'target_duration': request_config.get('duration') or serializer.validated_data.get('duration')
         }
+        if provided['source_ids']:
+            provided['source_ids'] = tuple(provided['source_ids'])
+        # Campos ausentes ficam com o default do ArtifactOptions
+        options = ArtifactOptions(**{k: v for k, v in provided.items() if v})
 
         # Generate Real Content via AI (Async)
         try:
@@ -289,26 +383,27 @@ class KnowledgeArtifactViewSet(viewsets.ModelViewSet):
             ).start()
         except Exception as e:
             logger.error(f"Error starting artifact generation thread: {e}", exc_info=True)
-            instance.status = KnowledgeArtifact.Status.ERROR
-            instance.save()
+            _set_artifact_state(instance, KnowledgeArtifact.Status.ERROR)
 
     def _generate_content_with_ai(self, artifact_id, options):
         """
         Generates content using the configured AI service (Gemini/Vertex) with Structured Output.
         """
         try:
-            artifact = KnowledgeArtifact.objects.get(id=artifact_id)
+            # Only what generation reads; content from a prior attempt can be large
+            artifact = KnowledgeArtifact.objects.only('id', 'type', 'title', 'chat').get(id=artifact_id)
         except KnowledgeArtifact.DoesNotExist:
             logger.error(f"Artifact {artifact_id} not found in generation thread.")
             return
 
+        started = time.perf_counter()
         try:
             # 1. Retrieve Context using SourceAssemblyService
             config = {
-                'selectedSourceIds': options.get('source_ids', []),
+                'selectedSourceIds': list(options.source_ids),
                 # 'includeChatContext': Removed per audit requirement
             }
-            full_context = SourceAssemblyService.get_context_from_config(artifact.chat.id, config)
+            full_context = SourceAssemblyService.get_context_from_config(artifact.chat_id, config)
 
             # Handle Podcast flow separately
             if artifact.type == KnowledgeArtifact.ArtifactType.PODCAST:
@@ -332,97 +427,113 @@ class KnowledgeArtifactViewSet(viewsets.ModelViewSet):
             if response_schema:
                 generate_config.response_schema = response_schema
 
-            response = client.models.generate_content(
-                model=model_name,
-                contents="Generate the artifact content based on the system instructions and context.",
-                config=generate_config
-            )
-
-            # 4. Parse & Save
-            if response.parsed:
-                artifact.content = response.parsed
-            else:
+            # 4. Stream, Parse & Save (retrying transient failures, including unparseable output)
+            expect_json = artifact.type != KnowledgeArtifact.ArtifactType.SUMMARY
+            for attempt in range(MAX_GENERATION_ATTEMPTS):
                 try:
-                    artifact.content = json.loads(response.text)
-                except:
-                     if artifact.type == KnowledgeArtifact.ArtifactType.SUMMARY:
-                         artifact.content = {"summary": response.text}
-                     else:
-                         raise ValueError("Failed to parse JSON response")
-
-            artifact.status = KnowledgeArtifact.Status.READY
-            artifact.save()
+                    # Backoff sleeps happen outside the slot
+                    with _GENERATION_SLOTS:
+                        text = self._stream_artifact_text(client, model_name, generate_config, expect_json)
+                    content = self._parse_artifact_text(artifact.type, text)
+                    break
+                except _RETRYABLE as e:
+                    if attempt == MAX_GENERATION_ATTEMPTS - 1:
+                        raise
+                    delay = _backoff_delay(attempt)
+                    logger.warning(
+                        f"Artifact {artifact_id} generation attempt {attempt + 1} failed ({e}); retrying in {delay:.2f}s"
+                    )
+                    time.sleep(delay)
+
+            _set_artifact_state(artifact, KnowledgeArtifact.Status.READY, content=content)
 
         except Exception as e:
             logger.error(f"AI Generation Failed for artifact {artifact_id}: {e}")
-            artifact.status = KnowledgeArtifact.Status.ERROR
-            artifact.save()
+            _set_artifact_state(artifact, KnowledgeArtifact.Status.ERROR)
+        finally:
+            _log_generation(artifact, started)
+
+    def _stream_artifact_text(self, client, model_name, generate_config, expect_json):
+        """
+        Streams the generation and returns the full text. When JSON is
+        expected, output that does not open with '[' or '{' aborts the
+        stream on the first chunk instead of after the whole generation.
+        """
+        parts = []
+        checked = not expect_json
+        for chunk in client.models.generate_content_stream(
+            model=model_name,
+            contents="Generate the artifact content based on the system instructions and context.",
+            config=generate_config
+        ):
+            text = chunk.text
+            if not text:
+                continue
+            parts.append(text)
+            if not checked:
+                head = ''.join(parts).lstrip()
+                if head:
+                    if head[0] not in '[{':
+                        raise orjson.JSONDecodeError("Model output is not JSON", head[:50], 0)
+                    checked = True
+        return ''.join(parts)
+
+    def _parse_artifact_text(self, artifact_type, text):
+        """JSON output of the model; summaries fall back to the raw text."""
+        try:
+            return orjson.loads(text)
+        except orjson.JSONDecodeError:
+            if artifact_type == KnowledgeArtifact.ArtifactType.SUMMARY:
+                return {"summary": text}
+            raise
 
     def _generate_podcast(self, artifact, context, options):
         """Helper to handle podcast generation logic."""
         try:
             # 1. Generate Script
-            script = PodcastScriptingService.generate_script(
-                title=artifact.title,
-                context=context,
-                duration_constraint=options.get('target_duration', 'Medium')
-            )
-            artifact.content = script
-            artifact.save()
+            with _GENERATION_SLOTS:
+                script = PodcastScriptingService.generate_script(
+                    title=artifact.title,
+                    context=context,
+                    duration_constraint=options.target_duration or 'Medium'
+                )
 
             # 2. Mix Audio
             audio_path = AudioMixerService.mix_podcast(script)
 
-            artifact.media_url = f"/media/{audio_path}"
-            artifact.duration = options.get('target_duration', '10:00')
-
-            artifact.status = KnowledgeArtifact.Status.READY
-            artifact.save()
+            # Script, media and status land in one UPDATE
+            _set_artifact_state(
+                artifact,
+                KnowledgeArtifact.Status.READY,
+                content=script,
+                media_url=audio_path,
+                duration=options.target_duration or '10:00'
+            )
 
         except Exception as e:
             logger.error(f"Podcast Generation Failed: {e}")
-            artifact.status = KnowledgeArtifact.Status.ERROR
-            artifact.save()
+            _set_artifact_state(artifact, KnowledgeArtifact.Status.ERROR)
 
     def _build_prompt_and_schema(self, artifact_type, title, context, options):
-        difficulty = options.get('difficulty', 'Medium')
-        quantity = options.get('quantity', 10)
-        instructions = options.get('custom_instructions', '')
-
-        base_instruction = (
-            f"You are an expert educational content generator. "
-            f"Create a {artifact_type} titled '{title}'.\n"
-            f"Language: Detect the language from the context (default to Portuguese if unclear).\n"
-            f"Target Audience Difficulty: {difficulty}.\n"
+        instructions = options.custom_instructions
+        before_title, after_title, after_context, schema = _artifact_prompt_skeleton(
+            artifact_type,
+            str(options.difficulty),
+            str(options.quantity),
+            bool(instructions)
         )
-        
-        if instructions:
-            base_instruction += f"CUSTOM INSTRUCTIONS:\n{instructions}\n"
-
-        base_instruction += f"\nCONTEXT MATERIAL (Source Files Only):\n{context}\n"
-
-        schema = None
-
-        if artifact_type == KnowledgeArtifact.ArtifactType.QUIZ:
-            base_instruction += f"Generate exactly {quantity} questions."
-            schema = QUIZ_SCHEMA
-        
-        elif artifact_type == KnowledgeArtifact.ArtifactType.FLASHCARD:
-            base_instruction += f"Generate exactly {quantity} cards."
-            schema = FLASHCARD_SCHEMA
-
-        elif artifact_type == KnowledgeArtifact.ArtifactType.SUMMARY:
-            base_instruction += "Generate a comprehensive summary and key points."
-            schema = SUMMARY_SCHEMA
-
-        elif artifact_type == KnowledgeArtifact.ArtifactType.SLIDE:
-            base_instruction += f"Generate exactly {quantity} slides."
-            schema = SLIDE_SCHEMA
-        
-        return base_instruction, schema
+        # One join over the cached pieces: the (possibly multi-MB) context is copied once
+        instruction = ''.join((
+            before_title, title, after_title,
+            f"{instructions}\n" if instructions else "",
+            "\nCONTEXT MATERIAL (Source Files Only):\n", context, after_context
+        ))
+        return instruction, schema
 
     @action(detail=True, methods=['get'])
     def export(self, request, pk=None):
+        # Export libraries (weasyprint especially) are heavy to import and only
+        # needed here, so they are imported per branch instead of at module load.
         artifact = self.get_object()
 
         # 1. PODCAST (Áudio) - Download Direto
@@ -430,11 +541,12 @@ class KnowledgeArtifactViewSet(viewsets.ModelViewSet):
             if not artifact.media_url:
                 return HttpResponse("Áudio não disponível", status=404)
             response = HttpResponse(status=302)
-            response['Location'] = artifact.media_url
+            response['Location'] = artifact.get_media_url()
             return response
 
         # 2. SLIDES (PowerPoint .pptx)
         elif artifact.type == KnowledgeArtifact.ArtifactType.SLIDE:
+            from pptx import Presentation
             prs = Presentation()
 
             content = artifact.content if isinstance(artifact.content, list) else []
@@ -476,6 +588,7 @@ class KnowledgeArtifactViewSet(viewsets.ModelViewSet):
 
         # 3. SPREADSHEET (Excel .xlsx)
         elif artifact.type == KnowledgeArtifact.ArtifactType.SPREADSHEET:
+            from openpyxl import Workbook as ExcelWorkbook
             wb = ExcelWorkbook()
             ws = wb.active
             ws.title = "Dados"
@@ -500,6 +613,7 @@ class KnowledgeArtifactViewSet(viewsets.ModelViewSet):
 
         # 4. DOCUMENTOS RICOS (PDF via HTML)
         else:
+            from weasyprint import HTML
             context = {'artifact': artifact, 'content': artifact.content}
             html_string = render_to_string('studio/pdf_template.html', context)
             response = HttpResponse(content_type='application/pdf')